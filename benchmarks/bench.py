@@ -0,0 +1,140 @@
+"""Offline benchmark of search and visit_links against the fixture server.
+
+    python benchmarks/bench.py --concurrency 1,2,4,8 --notes 40
+    python benchmarks/bench.py --block_mode cdp  # compare with route
+
+For each concurrency level a fresh BrowserClient searches the fixture
+explore feed, then visits the notes it found. Reports notes/sec, visit
+latency percentiles (from client.metrics) and peak memory. Browser memory is
+only included when psutil is installed.
+"""
+
+import asyncio
+import resource
+import sys
+from time import time
+
+import fire
+from fixture_server import FixtureServer
+
+from localred import BlockPolicy, BrowserClient
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+class PeakMemory:
+    """Samples the RSS of this process and its children in the background."""
+
+    def __init__(self, interval: float = 0.2):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._task = None
+
+    def _sample(self) -> float:
+        if psutil is None:
+            # ru_maxrss is in KB on Linux and in bytes on macOS
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+        process = psutil.Process()
+        total = 0
+        for p in [process] + process.children(recursive=True):
+            try:
+                total += p.memory_info().rss
+            except psutil.Error:
+                pass
+        return total / (1024 * 1024)
+
+    async def _run(self):
+        while True:
+            self.peak_mb = max(self.peak_mb, self._sample())
+            await asyncio.sleep(self.interval)
+
+    def __enter__(self):
+        self._task = asyncio.ensure_future(self._run())
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._task.cancel()
+        self.peak_mb = max(self.peak_mb, self._sample())
+
+
+async def bench_once(
+    server: FixtureServer,
+    concurrency: int,
+    notes: int,
+    headless: bool,
+    with_comments: bool = True,
+    block_mode: str = "auto",
+):
+    with PeakMemory() as memory:
+        async with BrowserClient(
+            remote_debugging_port=0,
+            headless=headless,
+            browser_state_path=None,
+            concurrency=concurrency,
+            base_url=server.url,
+            block_policy=BlockPolicy(mode=block_mode),
+        ) as client:
+            start = time()
+            found = await client.search(None, max_results=notes)
+            search_time = time() - start
+
+            start = time()
+            visited = await client.visit_links(found, with_comments=with_comments)
+            visit_time = time() - start
+            latency = client.metrics.snapshot().get("visit")
+
+    return {
+        "concurrency": concurrency,
+        "found": len(found),
+        "visited": len(visited),
+        "search_s": search_time,
+        "notes_per_s": len(visited) / visit_time if visit_time else 0.0,
+        "p50_s": latency.p50 if latency else 0.0,
+        "p95_s": latency.p95 if latency else 0.0,
+        "p99_s": latency.p99 if latency else 0.0,
+        "peak_mb": memory.peak_mb,
+    }
+
+
+async def main(
+    concurrency: tuple = (1, 2, 4, 8),
+    notes: int = 40,
+    latency: float = 0.05,
+    comments_delay: float = 0.3,
+    headless: bool = True,
+    with_comments: bool = True,  # False reads notes from the initial state
+    block_mode: str = "auto",  # auto, cdp or route, see BlockPolicy
+):
+    if isinstance(concurrency, int):
+        concurrency = (concurrency,)
+
+    with FixtureServer(latency=latency, comments_delay=comments_delay) as server:
+        print(f"Fixture server on {server.url}")
+        if psutil is None:
+            print("psutil not installed, peak memory covers this process only")
+
+        rows = []
+        for c in concurrency:
+            rows.append(
+                await bench_once(
+                    server, int(c), notes, headless, with_comments, block_mode
+                )
+            )
+
+    header = f"{'conc':>4} {'found':>5} {'visited':>7} {'search s':>8} {'notes/s':>8} {'p50 s':>6} {'p95 s':>6} {'p99 s':>6} {'peak MB':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(
+            f"{r['concurrency']:>4} {r['found']:>5} {r['visited']:>7} {r['search_s']:>8.2f} "
+            f"{r['notes_per_s']:>8.2f} {r['p50_s']:>6.2f} {r['p95_s']:>6.2f} {r['p99_s']:>6.2f} "
+            f"{r['peak_mb']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    fire.Fire(main)
@@ -0,0 +1,376 @@
+"""A local HTTP server mimicking the explore, search_result and note pages.
+
+Pages are synthetic but use the same markup and API shapes the extractors
+rely on, so BrowserClient(base_url=server.url) runs its normal code paths
+without touching the network. Run it standalone to poke at the pages:
+
+    python benchmarks/fixture_server.py --port 8765
+"""
+
+import html
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import fire
+
+FEED_PATHS = {
+    "/api/sns/web/v1/homefeed": "pc_feed",
+    "/api/sns/web/v1/search/notes": "pc_search",
+}
+
+FEED_PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><title>fixture feed</title>
+<style>section.note-item {{ height: 300px; }}</style></head>
+<body>
+<div class="feeds-container">{items}</div>
+<script>
+(() => {{
+    const api = {api};
+    const keyword = {keyword};
+    let cursor = {cursor};
+    let loading = false;
+    const container = document.querySelector(".feeds-container");
+    const render = (item) => {{
+        const card = item.note_card;
+        const section = document.createElement("section");
+        section.className = "note-item";
+        section.innerHTML =
+            `<a class="cover" href="/explore/${{item.id}}?xsec_token=${{item.xsec_token}}">` +
+            (card.type === "video" ? '<span class="play-icon"></span>' : "") +
+            `<img src="${{card.cover.url_default}}"></a>` +
+            `<div class="footer"><a class="title"></a><div class="author-wrapper">` +
+            `<span class="name"></span><span class="count"></span></div></div>`;
+        section.querySelector(".title").textContent = card.display_title;
+        section.querySelector(".name").textContent = card.user.nickname;
+        section.querySelector(".count").textContent = card.interact_info.liked_count;
+        return section;
+    }};
+    const loadMore = async () => {{
+        if (loading) return;
+        loading = true;
+        try {{
+            const resp = await fetch(api, {{
+                method: "POST",
+                headers: {{"content-type": "application/json"}},
+                body: JSON.stringify({{cursor_score: String(cursor), keyword}}),
+            }});
+            const data = await resp.json();
+            data.data.items.forEach((item) => container.appendChild(render(item)));
+            cursor = data.data.cursor_score;
+        }} finally {{
+            loading = false;
+        }}
+    }};
+    window.addEventListener("scroll", () => {{
+        if (window.innerHeight + window.scrollY >= document.body.scrollHeight - 300) {{
+            loadMore();
+        }}
+    }});
+}})();
+</script>
+</body></html>
+"""
+
+NOTE_PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<script>window.__INITIAL_STATE__ = {initial_state};</script></head>
+<body>
+<style>.comment-item {{ height: 80px; }}</style>
+<div class="note-container">
+  <div class="author-wrapper"><span class="username">{author}</span></div>
+  <div class="title">{title}</div>
+  <div class="note-content">{content}<span class="date">{date}</span></div>
+  <div class="comments-el"></div>
+</div>
+<script>
+// comments load page by page from the comment API, like on the real site
+(() => {{
+    const commentsEl = document.querySelector(".comments-el");
+    let cursor = "";
+    let hasMore = true;
+    let loading = false;
+    const render = (c) => {{
+        const item = document.createElement("div");
+        item.className = "comment-item";
+        item.innerHTML = '<div class="author"><span class="name"></span></div>' +
+            '<div class="content"><span class="note-text"></span></div>';
+        item.querySelector(".name").textContent = c.user_info.nickname;
+        item.querySelector(".note-text").textContent = c.content;
+        return item;
+    }};
+    const loadComments = async () => {{
+        if (loading || !hasMore) return;
+        loading = true;
+        try {{
+            const resp = await fetch(`/api/sns/web/v2/comment/page?note_id={note_id}&cursor=${{cursor}}`);
+            const data = (await resp.json()).data;
+            if (!data.comments.length && !cursor) {{
+                commentsEl.innerHTML = '<p class="no-comments-text">no comments</p>';
+            }} else {{
+                let list = commentsEl.querySelector(".list-container");
+                if (!list) {{
+                    list = document.createElement("div");
+                    list.className = "list-container";
+                    commentsEl.appendChild(list);
+                }}
+                data.comments.forEach((c) => list.appendChild(render(c)));
+            }}
+            cursor = data.cursor;
+            hasMore = data.has_more;
+        }} finally {{
+            loading = false;
+        }}
+    }};
+    setTimeout(loadComments, {comments_delay_ms});
+    window.addEventListener("scroll", () => {{
+        if (window.innerHeight + window.scrollY >= document.body.scrollHeight - 300) {{
+            loadComments();
+        }}
+    }});
+}})();
+</script>
+</body></html>
+"""
+
+
+def _note_card(note_id: str) -> dict:
+    rng = random.Random(note_id)
+    return {
+        "type": "video" if rng.random() < 0.2 else "normal",
+        "display_title": f"Note {note_id[-6:]}",
+        "user": {"nickname": f"author{rng.randint(1, 500)}", "user_id": note_id[:8]},
+        "interact_info": {"liked_count": str(rng.randint(0, 50000))},
+        "cover": {"url_default": f"/img/{note_id}.png"},
+    }
+
+
+def _feed_items(cursor: int, count: int) -> list:
+    return [
+        {
+            "id": f"{i:024x}",
+            "model_type": "note",
+            "xsec_token": f"token{i}",
+            "note_card": _note_card(f"{i:024x}"),
+        }
+        for i in range(cursor, cursor + count)
+    ]
+
+
+def _render_item(item: dict) -> str:
+    card = item["note_card"]
+    play_icon = '<span class="play-icon"></span>' if card["type"] == "video" else ""
+    return (
+        '<section class="note-item">'
+        f'<a class="cover" href="/explore/{item["id"]}?xsec_token={item["xsec_token"]}">'
+        f'{play_icon}<img src="{card["cover"]["url_default"]}"></a>'
+        '<div class="footer">'
+        f'<a class="title">{html.escape(card["display_title"])}</a>'
+        '<div class="author-wrapper">'
+        f'<span class="name">{html.escape(card["user"]["nickname"])}</span>'
+        f'<span class="count">{card["interact_info"]["liked_count"]}</span>'
+        "</div></div></section>"
+    )
+
+
+class FixtureServer:
+    """Serves synthetic pages in a background thread.
+
+    latency: seconds added to every response
+    page_size: notes per feed page
+    comments_delay: seconds before a note page renders its comments
+    comment_pages: pages of comments_per_note comments the comment API serves
+    """
+
+    def __init__(
+        self,
+        port: int = 0,
+        latency: float = 0.05,
+        page_size: int = 20,
+        comments_delay: float = 0.3,
+        comments_per_note: int = 20,
+        comment_pages: int = 1,
+        content_chars: int = 800,
+    ):
+        self.latency = latency
+        self.page_size = page_size
+        self.comments_delay = comments_delay
+        self.comments_per_note = comments_per_note
+        self.comment_pages = comment_pages
+        self.content_chars = content_chars
+        self.requests = 0
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def feed_page(self, api: str, keyword: str | None) -> str:
+        items = _feed_items(0, self.page_size)
+        return FEED_PAGE.format(
+            items="".join(_render_item(item) for item in items),
+            api=json.dumps(api),
+            keyword=json.dumps(keyword),
+            cursor=self.page_size,
+        )
+
+    def note_page(self, note_id: str) -> str:
+        rng = random.Random(note_id)
+        card = _note_card(note_id)
+        author = card["user"]["nickname"]
+        words = ["lorem", "ipsum", "dolor", "sit", "amet", "笔记", "分享", "好物"]
+        content = ""
+        while len(content) < self.content_chars:
+            content += rng.choice(words) + " "
+        date = f"2025-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}"
+        initial_state = {
+            "note": {
+                "noteDetailMap": {
+                    note_id: {
+                        "note": {
+                            "noteId": note_id,
+                            "title": card["display_title"],
+                            "desc": content.strip(),
+                            "type": card["type"],
+                            "time": int(
+                                time.mktime(time.strptime(date, "%Y-%m-%d")) * 1000
+                            ),
+                            "user": {"nickname": author},
+                            "interactInfo": {
+                                "likedCount": card["interact_info"]["liked_count"]
+                            },
+                        }
+                    }
+                }
+            }
+        }
+        return NOTE_PAGE.format(
+            initial_state=json.dumps(initial_state).replace("</", "<\\/"),
+            note_id=note_id,
+            title=html.escape(card["display_title"]),
+            author=html.escape(author),
+            content=html.escape(content.strip()),
+            date=date,
+            comments_delay_ms=int(self.comments_delay * 1000),
+        )
+
+    def comment_page(self, note_id: str, cursor: int) -> dict:
+        rng = random.Random(f"{note_id}:{cursor}")
+        start = cursor * self.comments_per_note
+        comments = [
+            {
+                "id": f"{note_id[-6:]}{i:06d}",
+                "content": f"comment {i} on {note_id[-6:]}",
+                "user_info": {"nickname": f"user{rng.randint(1, 9999)}"},
+                "sub_comments": [],
+            }
+            for i in range(start, start + self.comments_per_note)
+        ]
+        return {
+            "code": 0,
+            "success": True,
+            "data": {
+                "comments": comments,
+                "cursor": str(cursor + 1),
+                "has_more": cursor + 1 < self.comment_pages,
+            },
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str):
+                server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_html(self, page: str):
+                self._send(200, page.encode(), "text/html; charset=utf-8")
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                if url.path == "/explore":
+                    self._send_html(server.feed_page("/api/sns/web/v1/homefeed", None))
+                elif url.path == "/search_result":
+                    self._send_html(
+                        server.feed_page(
+                            "/api/sns/web/v1/search/notes",
+                            query.get("keyword", [""])[0],
+                        )
+                    )
+                elif url.path.startswith("/explore/"):
+                    self._send_html(server.note_page(url.path.split("/")[-1]))
+                elif url.path == "/api/sns/web/v2/comment/page":
+                    payload = server.comment_page(
+                        query.get("note_id", [""])[0],
+                        int(query.get("cursor", ["0"])[0] or 0),
+                    )
+                    self._send(200, json.dumps(payload).encode(), "application/json")
+                elif url.path.startswith("/img/"):
+                    self._send(200, b"\x89PNG\r\n\x1a\n" + b"\0" * 2048, "image/png")
+                else:
+                    self._send(404, b"not found", "text/plain")
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if url.path not in FEED_PATHS:
+                    self._send(404, b"not found", "text/plain")
+                    return
+                cursor = int(body.get("cursor_score") or 0)
+                payload = {
+                    "code": 0,
+                    "success": True,
+                    "data": {
+                        "cursor_score": str(cursor + server.page_size),
+                        "items": _feed_items(cursor, server.page_size),
+                    },
+                }
+                self._send(200, json.dumps(payload).encode(), "application/json")
+
+        return Handler
+
+
+def serve(port: int = 8765, latency: float = 0.05, comments_delay: float = 0.3):
+    server = FixtureServer(port=port, latency=latency, comments_delay=comments_delay)
+    print(f"Serving fixtures on {server.url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    fire.Fire(serve)
@@ -0,0 +1,106 @@
+"""Throughput and memory of Note against its previous definition.
+
+    python benchmarks/note_model.py --count 100000
+
+The baseline re-parses the id with re.search on every access (including
+serialisation) and is built one Note(**d) at a time.
+"""
+
+import re
+import tracemalloc
+from time import perf_counter
+from typing import List, Optional
+
+import fire
+from pydantic import BaseModel, computed_field
+
+from localred import Note
+
+
+class BaselineNote(BaseModel):
+    url: str
+    title: Optional[str] = None
+    author: Optional[str] = None
+    content: Optional[str] = None
+    is_video: bool = False
+    like_count: Optional[int] = None
+    cover_url: Optional[str] = None
+    date_string: Optional[str] = None
+    comments: List[str] = []
+
+    @computed_field
+    @property
+    def id(self) -> Optional[str]:
+        match = re.search(r"/explore/([a-zA-Z0-9]+)", self.url)
+        if match:
+            return match.group(1)
+        return None
+
+
+def _dicts(count: int) -> List[dict]:
+    return [
+        {
+            "url": f"https://www.xiaohongshu.com/explore/{i:024x}?xsec_token=ABC{i}&xsec_source=pc_feed",
+            "title": f"title {i}",
+            "author": f"author {i % 500}",
+            "like_count": i,
+            "cover_url": f"https://sns-webpic-qc.xhscdn.com/{i:024x}",
+            "is_video": i % 5 == 0,
+        }
+        for i in range(count)
+    ]
+
+
+def _timed(fn):
+    start = perf_counter()
+    result = fn()
+    return result, perf_counter() - start
+
+
+def _measure(name: str, build, dicts: List[dict], id_reads: int) -> dict:
+    tracemalloc.start()
+    notes, build_time = _timed(lambda: build(dicts))
+
+    def read_ids():
+        for _ in range(id_reads):
+            for n in notes:
+                n.id
+
+    _, id_time = _timed(read_ids)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    _, dump_time = _timed(lambda: [n.model_dump_json() for n in notes])
+    count = len(notes)
+    return {
+        "name": name,
+        "build_per_s": count / build_time,
+        "id_reads_per_s": count * id_reads / id_time,
+        "dumps_per_s": count / dump_time,
+        "bytes_per_note": current / count,
+    }
+
+
+def main(count: int = 100_000, id_reads: int = 5):
+    dicts = _dicts(count)
+    rows = [
+        _measure(
+            "baseline", lambda ds: [BaselineNote(**d) for d in ds], dicts, id_reads
+        ),
+        _measure("Note(**d)", lambda ds: [Note(**d) for d in ds], dicts, id_reads),
+        _measure("Note.from_dicts", Note.from_dicts, dicts, id_reads),
+    ]
+
+    header = (
+        f"{'':16} {'build/s':>10} {'id reads/s':>12} {'dumps/s':>10} {'bytes/note':>10}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(
+            f"{r['name']:16} {r['build_per_s']:>10,.0f} {r['id_reads_per_s']:>12,.0f} "
+            f"{r['dumps_per_s']:>10,.0f} {r['bytes_per_note']:>10,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    fire.Fire(main)
@@ -0,0 +1,42 @@
+from typing import Optional
+
+import fire
+
+from localred.client import BrowserClient
+from localred.export import NoteSink
+from localred.monitor import Monitor
+
+OUTPUT_DIR = "./outputs/monitor/"
+
+
+# polls /explore (or the given queries) and appends new notes to rotating
+# JSONL files until interrupted
+async def run(
+    queries: Optional[tuple] = None,
+    interval: float = 300,
+    limit: int = 30,
+    polls: Optional[int] = None,
+    headless: bool = True,
+    remote_debugging_port: int = 0,
+):
+    if isinstance(queries, str):
+        queries = (queries,)
+
+    async with BrowserClient(
+        remote_debugging_port=remote_debugging_port, headless=headless
+    ) as client:
+        with NoteSink(OUTPUT_DIR) as sink:
+            monitor = Monitor(
+                client,
+                queries=list(queries) if queries else [None],
+                interval=interval,
+                max_results=limit,
+                sink=sink,
+                on_note=lambda note: print(f"New: {note.title} {note.url}"),
+            )
+            await monitor.run(max_polls=polls)
+        print(f"Emitted {monitor.emitted} notes into {', '.join(sink.paths)}")
+
+
+if __name__ == "__main__":
+    fire.Fire(run)
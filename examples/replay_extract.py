@@ -0,0 +1,47 @@
+from time import time
+from typing import Optional
+
+import fire
+
+from localred.client import BrowserClient
+from localred.recording import har_note_urls
+
+HAR_PATH = "./outputs/crawl.har.zip"
+
+
+# record: crawl live and keep every response in the archive
+# replay (default): re-run extraction over the recorded notes without network
+async def run(
+    record: bool = False,
+    query: Optional[str] = None,
+    limit: int = 20,
+    har_path: str = HAR_PATH,
+    headless: bool = True,
+):
+    start_time = time()
+    if record:
+        async with BrowserClient(
+            remote_debugging_port=0, headless=headless, record_path=har_path
+        ) as client:
+            notes = await client.search(query, max_results=limit, visit_links=True)
+        print(f"Recorded {len(notes)} notes into {har_path}")
+    else:
+        urls = har_note_urls(har_path)
+        async with BrowserClient(
+            remote_debugging_port=0,
+            headless=headless,
+            browser_state_path=None,
+            concurrency=8,
+            replay_path=har_path,
+        ) as client:
+            notes = await client.visit_links(urls)
+        print(f"Re-extracted {len(notes)}/{len(urls)} notes from {har_path}")
+        for note in notes[:3]:
+            print("\n" + "-" * 70)
+            print(note.to_md(truncate_num=200, comments_limit=3))
+
+    print(f"Total time taken: {time() - start_time:.2f}s")
+
+
+if __name__ == "__main__":
+    fire.Fire(run)
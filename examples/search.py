@@ -7,6 +7,7 @@ from typing import Optional
 import fire
 
 from localred.client import BrowserClient
+from localred.export import NoteSink
 
 # Constants
 OUTPUT_DIR = Path("./outputs/")
@@ -20,6 +21,7 @@ async def run_search(
     headless: bool = True,
     remote_debugging_port: int = 0,
     browser_state_path: str | None = None,
+    export_dir: str | None = None,
 ):
     output_dir = OUTPUT_DIR
     os.makedirs(output_dir, exist_ok=True)
@@ -30,11 +32,23 @@ async def run_search(
         browser_state_path=browser_state_path,
     ) as client:
         start_time = time()
-        results = await client.search(query, max_results=limit, visit_links=visit)
-        end_time = time()
+        total = 0
 
-        # Process and save results
-        for result in results:
+        # Stream everything into rotating compressed JSONL instead of per-note files
+        if export_dir:
+            with NoteSink(export_dir) as sink:
+                total = await sink.consume(
+                    client.iter_search(query, max_results=limit, visit_links=visit)
+                )
+            print(f"Exported {total} notes to {', '.join(sink.paths)}")
+            print(f"Total time taken: {time() - start_time:.2f}s")
+            return
+
+        # Process and save results as soon as each one is ready
+        async for result in client.iter_search(
+            query, max_results=limit, visit_links=visit
+        ):
+            total += 1
             # Print preview
             print("\n" + "-" * 70)
             print(result.to_md(truncate_num=CONTENT_PREVIEW_LIMIT))
@@ -52,8 +66,8 @@ async def run_search(
                 output_file.write_text(result.content)
                 print(f"\nFull content saved to: {output_file}")
 
-        print(f"\nTotal results: {len(results)}")
-        print(f"Total time taken: {end_time - start_time:.2f}s")
+        print(f"\nTotal results: {total}")
+        print(f"Total time taken: {time() - start_time:.2f}s")
 
 
 if __name__ == "__main__":
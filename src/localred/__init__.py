@@ -1,4 +1,42 @@
+from .cache import NoteCache
+from .cli import main
 from .client import BrowserClient
-from .models import Note
+from .covers import CoverCache, CoverDownloader
+from .dedupe import Deduper
+from .export import NoteSink, read_notes
+from .index import NoteIndex
+from .models import (
+    BlockPolicy,
+    CommentPolicy,
+    Note,
+    RecyclePolicy,
+    RetryPolicy,
+    ScrollPolicy,
+    TrafficStats,
+    VisitResult,
+)
+from .monitor import Monitor, SeenSet
+from .sharding import ShardedClient
 
-__all__ = ["BrowserClient", "Note"]
+__all__ = [
+    "BlockPolicy",
+    "BrowserClient",
+    "CommentPolicy",
+    "CoverCache",
+    "CoverDownloader",
+    "Deduper",
+    "Monitor",
+    "Note",
+    "NoteCache",
+    "NoteIndex",
+    "NoteSink",
+    "RecyclePolicy",
+    "RetryPolicy",
+    "ScrollPolicy",
+    "SeenSet",
+    "ShardedClient",
+    "TrafficStats",
+    "VisitResult",
+    "main",
+    "read_notes",
+]
@@ -0,0 +1,159 @@
+import re
+from typing import Dict, List
+
+from playwright.async_api import BrowserContext, CDPSession, Page
+
+from .models import BlockPolicy
+from .utils import logger
+
+# the network layer only sees urls, so resource types are approximated by
+# extensions and the CDN hosts serving them. Patterns match anywhere in the
+# url, so "*.js" also covers "main.js?v=1" (and "data.json").
+_EXTENSIONS = {
+    "image": ["png", "jpg", "jpeg", "webp", "gif", "avif", "svg", "ico", "heic"],
+    "media": ["mp4", "m3u8", "m4s", "webm", "mp3", "m4a"],
+    "font": ["woff", "woff2", "ttf", "otf"],
+    "stylesheet": ["css"],
+    "script": ["js", "mjs"],
+}
+_HOSTS = {
+    "image": [
+        "*sns-webpic*.xhscdn.com/*",
+        "*sns-img*.xhscdn.com/*",
+        "*sns-avatar*.xhscdn.com/*",
+    ],
+    "media": ["*sns-video*.xhscdn.com/*"],
+}
+RESOURCE_PATTERNS: Dict[str, List[str]] = {
+    kind: [f"*.{ext}" for ext in exts] + _HOSTS.get(kind, [])
+    for kind, exts in _EXTENSIONS.items()
+}
+
+
+def block_patterns(policy: BlockPolicy) -> List[str]:
+    patterns = []
+    for kind in policy.resource_types:
+        if kind not in RESOURCE_PATTERNS:
+            raise ValueError(f"Cannot block resource type: {kind}")
+        patterns.extend(RESOURCE_PATTERNS[kind])
+    return patterns + policy.url_patterns
+
+
+# matches like Network.setBlockedURLs: the parts between "*" appear in the url
+# in order, anywhere in it. Routes search for the regex, so it is not anchored.
+def _wildcard_regex(patterns: List[str]) -> re.Pattern | None:
+    if not patterns:
+        return None
+    # leading and trailing wildcards change nothing
+    escaped = [".*".join(map(re.escape, p.strip("*").split("*"))) for p in patterns]
+    return re.compile("|".join(f"(?:{p})" for p in escaped))
+
+
+class ResourceBlocker:
+    """Applies a BlockPolicy to a context and its pages, counting what it blocks.
+
+    Route mode aborts blocked requests from a route that only matches them,
+    so allowed requests are matched in the Playwright driver and never cross
+    over to Python. cdp mode drops blocked requests in the browser, but the
+    Network domain it enables on each page forwards every network event of
+    that page to Python. One blocker can serve several contexts, e.g. the
+    shards of a client.
+    """
+
+    def __init__(self, policy: BlockPolicy | None = None):
+        self.policy = policy or BlockPolicy()
+        self.use_cdp = self.policy.mode == "cdp"
+        if self.use_cdp and self.policy.allow:
+            logger.warning("Allow patterns are ignored in cdp block mode")
+        self.blocked = 0
+        self.blocked_by_type: Dict[str, int] = {}
+        self._patterns = block_patterns(self.policy)
+        self._regex = _wildcard_regex(self._patterns)
+        self._allow_regex = _wildcard_regex(self.policy.allow)
+        self._sessions: Dict[Page, CDPSession] = {}
+
+    def _count(self, resource_type: str) -> None:
+        self.blocked += 1
+        self.blocked_by_type[resource_type] = (
+            self.blocked_by_type.get(resource_type, 0) + 1
+        )
+
+    async def _route(self, route) -> None:
+        request = route.request
+        if self._allow_regex and self._allow_regex.search(request.url):
+            # fallback, so context routes (e.g. HAR replay) still see it
+            await route.fallback()
+            return
+        self._count(request.resource_type)
+        await route.abort("blockedbyclient")
+
+    # cdp mode, requests dropped by Network.setBlockedURLs fail like aborted ones
+    def _on_request_failed(self, request) -> None:
+        if "ERR_BLOCKED_BY_CLIENT" in (request.failure or ""):
+            self._count(request.resource_type)
+
+    async def setup_context(self, context: BrowserContext) -> None:
+        if not self.use_cdp and self._regex:
+            await context.route(self._regex, self._route)
+
+    async def _session(self, page: Page) -> CDPSession | None:
+        if page in self._sessions:
+            return self._sessions[page]
+        try:
+            session = await page.context.new_cdp_session(page)
+            await session.send("Network.enable")
+        except Exception as e:
+            # not chromium: block through a page route instead
+            logger.debug(f"No CDP session, blocking with routes: {e}")
+            self._sessions[page] = None
+            return None
+        page.on("requestfailed", self._on_request_failed)
+        self._sessions[page] = session
+        page.once("close", lambda _: self._sessions.pop(page, None))
+        return session
+
+    # blocks `patterns` on the page, replacing what was blocked before
+    async def _set_blocked(self, page: Page, patterns: List[str]) -> None:
+        session = await self._session(page)
+        if session:
+            await session.send("Network.setBlockedURLs", {"urls": patterns})
+            return
+        await page.unroute_all()
+        if patterns:
+            await page.route(_wildcard_regex(patterns), self._route)
+
+    # a new page, blocking per the policy. Route mode pages are covered by the
+    # context route already.
+    async def setup_page(self, page: Page) -> None:
+        if self.use_cdp:
+            await self._set_blocked(page, self._patterns)
+
+    # widens the blocking of one page, e.g. to resource types search does not
+    # need once the first results rendered
+    async def extend(self, page: Page, resource_types: List[str]) -> None:
+        policy = self.policy.model_copy(
+            update={
+                "resource_types": sorted(
+                    set(self.policy.resource_types) | set(resource_types)
+                )
+            }
+        )
+        if self.use_cdp:
+            await self._set_blocked(page, block_patterns(policy))
+        else:
+            await page.unroute_all()
+            await page.route(_wildcard_regex(block_patterns(policy)), self._route)
+
+    # blocks every further request of the page, e.g. once a note rendered
+    async def block_all(self, page: Page) -> None:
+        if self.use_cdp:
+            await self._set_blocked(page, ["*"])
+        else:
+            await page.route("**/*", self._route)
+
+    # undoes extend and block_all, for pages that are reused
+    async def restore(self, page: Page) -> None:
+        if self.use_cdp:
+            await self._set_blocked(page, self._patterns)
+        else:
+            await page.unroute_all()
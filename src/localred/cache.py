@@ -0,0 +1,152 @@
+import os
+import sqlite3
+from time import time
+
+from pydantic import BaseModel
+
+from .models import Note
+from .utils import logger
+
+
+class CacheStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0  # misses because the entry was older than its ttl
+    stale_hits: int = 0  # expired entries served because revisiting failed
+    evictions: int = 0
+    entries: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class NoteCache:
+    """On-disk cache of visited notes keyed by Note.id, backed by SQLite.
+
+    Content (title, body, date) and comments are timestamped separately so
+    they can expire at different rates. Once more than `max_entries` notes are
+    stored, the least recently used ones are evicted.
+    """
+
+    def __init__(
+        self,
+        path: str = "~/.localred.cache.sqlite",
+        content_ttl: float = 7 * 24 * 3600,
+        comments_ttl: float = 24 * 3600,
+        max_entries: int = 50_000,
+    ):
+        self.path = os.path.expanduser(path)
+        self.content_ttl = content_ttl
+        self.comments_ttl = comments_ttl
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+
+        self._db = sqlite3.connect(self.path)
+        # WAL lets shards in other processes read while one writes
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS notes (
+                id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                content_at REAL NOT NULL,
+                comments_at REAL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS notes_accessed_at ON notes (accessed_at)"
+        )
+        self._db.commit()
+        (self.stats.entries,) = self._db.execute(
+            "SELECT COUNT(*) FROM notes"
+        ).fetchone()
+
+    def get(
+        self, note_id: str, with_comments: bool = True, allow_stale: bool = False
+    ) -> Note | None:
+        row = self._db.execute(
+            "SELECT data, content_at, comments_at FROM notes WHERE id = ?",
+            (note_id,),
+        ).fetchone()
+        if not row:
+            if not allow_stale:
+                self.stats.misses += 1
+            return None
+
+        data, content_at, comments_at = row
+        now = time()
+        fresh = now - content_at < self.content_ttl
+        if with_comments:
+            fresh = fresh and (
+                comments_at is not None and now - comments_at < self.comments_ttl
+            )
+
+        if allow_stale:
+            self.stats.stale_hits += 1
+        elif fresh:
+            self.stats.hits += 1
+        else:
+            self.stats.misses += 1
+            self.stats.expired += 1
+            return None
+
+        self._db.execute(
+            "UPDATE notes SET accessed_at = ? WHERE id = ?", (now, note_id)
+        )
+        self._db.commit()
+        return Note.model_validate_json(data)
+
+    def put(self, note: Note, with_comments: bool = True) -> None:
+        if not note.id:
+            return
+        now = time()
+        existing = self._db.execute(
+            "SELECT data FROM notes WHERE id = ?", (note.id,)
+        ).fetchone()
+        if existing and not with_comments:
+            # keep the comments of a previous visit that loaded them
+            comments = Note.model_validate_json(existing[0]).comments
+            note = note.model_copy(update={"comments": comments})
+        self._db.execute(
+            """INSERT INTO notes (id, data, content_at, comments_at, accessed_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                data = excluded.data,
+                content_at = excluded.content_at,
+                comments_at = COALESCE(excluded.comments_at, notes.comments_at),
+                accessed_at = excluded.accessed_at""",
+            (
+                note.id,
+                note.model_dump_json(exclude={"id"}),
+                now,
+                now if with_comments else None,
+                now,
+            ),
+        )
+        if not existing:
+            self.stats.entries += 1
+            if self.stats.entries > self.max_entries:
+                self._evict(self.stats.entries - self.max_entries)
+        self._db.commit()
+
+    def _evict(self, count: int) -> None:
+        self._db.execute(
+            "DELETE FROM notes WHERE id IN "
+            "(SELECT id FROM notes ORDER BY accessed_at LIMIT ?)",
+            (count,),
+        )
+        self.stats.evictions += count
+        self.stats.entries -= count
+        logger.debug(f"Evicted {count} notes from cache")
+
+    # reopen the same database when sent to a worker process
+    def __reduce__(self):
+        return (
+            NoteCache,
+            (self.path, self.content_ttl, self.comments_ttl, self.max_entries),
+        )
+
+    def close(self) -> None:
+        self._db.close()
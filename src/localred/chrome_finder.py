@@ -10,6 +10,12 @@ CHROME_PATHS = {
     "Darwin": [
         "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
     ],
+    "Linux": [
+        "/usr/bin/google-chrome",
+        "/usr/bin/google-chrome-stable",
+        "/usr/bin/chromium",
+        "/usr/bin/chromium-browser",
+    ],
 }
 
 
@@ -0,0 +1,141 @@
+import argparse
+import asyncio
+import json
+import sys
+
+from .cache import NoteCache
+from .index import NoteIndex
+from .server import serve
+
+DEFAULT_PORT = 8765
+
+
+def _add_address_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--socket", help="unix socket path, instead of host:port")
+
+
+# sends one request to a running daemon, printing the body line by line as it
+# streams in. Returns False when the daemon answered with an error.
+async def _request(args, method: str, path: str, payload: dict | None) -> bool:
+    if args.socket:
+        reader, writer = await asyncio.open_unix_connection(args.socket)
+    else:
+        reader, writer = await asyncio.open_connection(args.host, args.port)
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(
+        (
+            f"{method} {path} HTTP/1.1\r\nHost: localred\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n"
+        ).encode()
+        + body
+    )
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    while (await reader.readline()).strip():
+        pass
+    async for line in reader:
+        sys.stdout.write(line.decode())
+        sys.stdout.flush()
+    writer.close()
+    return status == 200
+
+
+def _serve(args) -> None:
+    asyncio.run(
+        serve(
+            args.host,
+            args.port,
+            args.socket,
+            remote_debugging_port=args.remote_debugging_port,
+            concurrency=args.concurrency,
+            headless=not args.headed,
+            browser_state_path=args.browser_state_path or None,
+            cache=NoteCache(args.cache) if args.cache else None,
+            index=NoteIndex(args.index) if args.index else None,
+            adaptive_concurrency=args.adaptive,
+        )
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="localred")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser(
+        "serve", help="keep a browser warm and serve search and visits over HTTP"
+    )
+    _add_address_args(serve_parser)
+    serve_parser.add_argument("--concurrency", type=int, default=3)
+    serve_parser.add_argument("--adaptive", action="store_true")
+    serve_parser.add_argument(
+        "--remote-debugging-port",
+        type=int,
+        default=0,
+        help="attach to a running Chrome instead of launching one",
+    )
+    serve_parser.add_argument("--headed", action="store_true")
+    serve_parser.add_argument(
+        "--browser-state-path", default="~/.localred.browser_state.json"
+    )
+    serve_parser.add_argument("--cache", help="NoteCache sqlite path")
+    serve_parser.add_argument(
+        "--index", help="NoteIndex sqlite path, needed by search --source"
+    )
+
+    search_parser = commands.add_parser("search", help="search through a daemon")
+    _add_address_args(search_parser)
+    search_parser.add_argument("query", nargs="?", help="omit for /explore")
+    search_parser.add_argument("--limit", type=int, default=15)
+    search_parser.add_argument("--visit", action="store_true")
+    search_parser.add_argument(
+        "--no-comments", action="store_true", help="skip waiting for comments"
+    )
+    search_parser.add_argument(
+        "--source", choices=["live", "local", "hybrid"], default="live"
+    )
+    search_parser.add_argument(
+        "--max-age", type=float, help="seconds, ignore notes indexed earlier"
+    )
+
+    visit_parser = commands.add_parser("visit", help="visit notes through a daemon")
+    _add_address_args(visit_parser)
+    visit_parser.add_argument("urls", nargs="+")
+    visit_parser.add_argument(
+        "--no-comments", action="store_true", help="skip waiting for comments"
+    )
+
+    for name in ("health", "metrics"):
+        _add_address_args(commands.add_parser(name, help=f"GET /{name} of a daemon"))
+
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        _serve(args)
+        return
+
+    if args.command == "search":
+        request = (
+            "POST",
+            "/search",
+            {
+                "query": args.query,
+                "max_results": args.limit,
+                "visit_links": args.visit,
+                "with_comments": not args.no_comments,
+                "source": args.source,
+                "max_age": args.max_age,
+            },
+        )
+    elif args.command == "visit":
+        request = (
+            "POST",
+            "/visit_links",
+            {"urls": args.urls, "with_comments": not args.no_comments},
+        )
+    else:
+        request = ("GET", f"/{args.command}", None)
+    ok = asyncio.run(_request(args, *request))
+    sys.exit(0 if ok else 1)
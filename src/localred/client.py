@@ -2,29 +2,123 @@ import asyncio
 import base64
 import os
 import traceback
+from contextlib import asynccontextmanager
 from time import time
-from typing import Any, Awaitable, Callable, List, Optional
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+)
 
-from playwright.async_api import Page, async_playwright
+from playwright.async_api import BrowserContext, Page, async_playwright
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
+from .blocking import ResourceBlocker
+from .cache import NoteCache
 from .chrome_finder import find_chrome
-from .models import Note
-from .utils import build_search_url, load_js_file, logger
+from .comments import CommentCollector
+from .covers import CoverCache, CoverDownloader
+from .feed_api import feed_api_source, parse_feed_items
+from .index import NoteIndex
+from .limiter import ConcurrencyLimiter
+from .metrics import Metrics
+from .models import (
+    BlockPolicy,
+    CommentPolicy,
+    FailureKind,
+    Note,
+    RecyclePolicy,
+    RetryPolicy,
+    ScrollPolicy,
+    TrafficStats,
+    VisitBatch,
+    VisitResult,
+    VisitSummary,
+)
+from .page_pool import PagePool
+from .recording import record_har, replay_har
+from .recycling import BrowserMemory, browser_memory
+from .traffic import TrafficMeter
+from .utils import (
+    DEFAULT_BASE_URL,
+    build_search_url,
+    load_js_file,
+    logger,
+    parse_count,
+)
 
+_COUNT_NOTE_ITEMS_JS = "document.querySelectorAll('section.note-item').length"
+_NOTE_RENDERED_SELECTOR = ".comments-el .list-container, .no-comments-text"
 
-# returns None if not valid
-def _js_note_to_note(js_note: dict) -> Note | None:
-    if not js_note.get("url"):
-        logger.warning(f"Invalid note: {js_note}")
-        return None
-    return Note(
-        url=js_note["url"],
-        title=js_note["title"] or None,
-        author=js_note["author"] or None,
-        like_count=js_note["like_count_num"] or None,
-        cover_url=js_note["cover_url"] or None,
-        is_video=js_note["is_video"],
-    )
+# blocked on top of the block policy once search rendered its first results,
+# the feed API requests it still needs are xhr
+_SEARCH_BLOCKED_TYPES = ["image", "media", "stylesheet", "font", "script"]
+
+# where search looks for notes:
+# - live: searches the site
+# - local: only the notes of self.index, without opening a page
+# - hybrid: the indexed notes first, then the site if they are not enough
+SearchSource = Literal["live", "local", "hybrid"]
+
+
+# whether visit_link managed to fill in the note details
+def is_visited(note: Note) -> bool:
+    return bool(note.content or note.comments or note.date_string)
+
+
+def _classify_error(e: Exception) -> FailureKind:
+    message = str(e)
+    if "crash" in message.lower() or "has been closed" in message:
+        return "crash"
+    if isinstance(e, PlaywrightTimeoutError):
+        return "selector" if "wait_for_selector" in message else "timeout"
+    if "net::ERR_" in message or "NS_ERROR_" in message:
+        return "navigation"
+    return "error"
+
+
+# copy the details a visit collects from `source` into `target`
+def _fill_details(target: Note, source: Note) -> Note:
+    if not target.title:
+        target.title = source.title
+    if not target.author:
+        target.author = source.author
+    target.content = source.content
+    target.comments = source.comments
+    target.date_string = source.date_string
+    return target
+
+
+# converts dicts returned by explore_extract.js, skipping invalid ones
+def _js_notes_to_notes(js_notes: List[dict]) -> List[Note]:
+    valid = []
+    for js_note in js_notes:
+        if not js_note or not js_note.get("url"):
+            logger.warning(f"Invalid note: {js_note}")
+            continue
+        valid.append(
+            {
+                "url": js_note["url"],
+                "title": js_note["title"] or None,
+                "author": js_note["author"] or None,
+                "like_count": js_note["like_count_num"] or None,
+                "cover_url": js_note["cover_url"] or None,
+                "is_video": js_note["is_video"],
+            }
+        )
+    return Note.from_dicts(valid)
+
+
+# a search filter dropping `known` notes, e.g. live results already found locally
+def _not_in(known: List[Note]) -> Callable[[Note], bool]:
+    seen = {n.id or n.url for n in known}
+    return lambda n: (n.id or n.url) not in seen
 
 
 class BrowserClient:
@@ -35,26 +129,86 @@ class BrowserClient:
         headless: bool = True,  # only used when remote_debugging_port is not provided
         browser_state_path: str
         | None = "~/.localred.browser_state.json",  # None means do not load browser state
+        storage_state: dict | None = None,  # takes precedence over browser_state_path
+        cache: NoteCache | None = None,  # serve fresh notes without visiting
+        index: NoteIndex | None = None,  # every visited note, see search(source=)
+        adaptive_concurrency: bool = False,  # tune concurrency from visit outcomes
+        max_concurrency: int | None = None,  # upper bound when adaptive
+        retry_policy: RetryPolicy | None = None,
+        base_url: str = DEFAULT_BASE_URL,  # e.g. a local fixture server
+        # record responses into a HAR (.har/.zip), written when the client
+        # exits. Over CDP this records in a new context, logged in like the
+        # default one, since the default context is never closed.
+        record_path: str | None = None,
+        replay_path: str | None = None,  # serve responses from a recorded HAR only
+        block_policy: BlockPolicy | None = None,  # defaults to images and media
+        recycle_policy: RecyclePolicy | None = None,  # None keeps one context
     ):
         self.concurrency = concurrency
-        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.limiter = ConcurrencyLimiter(
+            concurrency,
+            adaptive=adaptive_concurrency,
+            max_limit=max_concurrency
+            or (concurrency * 4 if adaptive_concurrency else None),
+        )
         self.remote_debugging_port = remote_debugging_port
         self.headless = headless
+        self.base_url = base_url.rstrip("/")
+        self.record_path = record_path
+        self.replay_path = replay_path
+        self.storage_state = storage_state
+        self.cache = cache
+        self.index = index
+        self.retry_policy = retry_policy or RetryPolicy()
+        # see blocker.blocked for how many requests were blocked
+        self.blocker = ResourceBlocker(block_policy)
+        # per-phase timings, see Metrics.snapshot / to_prometheus / to_json
+        self.metrics = Metrics()
+        # network traffic of this session by operation, "search" or "visit"
+        self.traffic: Dict[str, TrafficStats] = {}
+        self.playwright = None
         self.browser = None
         self.context = None
+        self.page_pool: PagePool | None = None
+        self._owns_browser = True
+        # the default context of a browser connected over CDP is never closed
+        self._owns_context = True
+
+        if recycle_policy and record_path:
+            # a new context would record over the archive of the previous one
+            logger.warning("Context recycling is disabled while recording")
+            recycle_policy = None
+        self.recycle_policy = recycle_policy
+        self.recycles = 0
+        self.last_memory: BrowserMemory | None = None
+        self._context_pages = 0  # pages loaded in the current context
+        self._context_users = 0
+        self._context_ready = asyncio.Event()  # cleared while recycling
+        self._context_ready.set()
+        self._context_idle = asyncio.Event()  # set while no work uses the context
+        self._context_idle.set()
+        self._recycle_lock = asyncio.Lock()
+        self._recycle_task: asyncio.Future | None = None
         self.browser_state_path = (
             os.path.expanduser(browser_state_path) if browser_state_path else None
         )
 
     async def __aenter__(self):
-        playwright = await async_playwright().start()
+        self.playwright = await async_playwright().start()
         if self.remote_debugging_port:
-            self.browser = await playwright.chromium.connect_over_cdp(
+            self.browser = await self.playwright.chromium.connect_over_cdp(
                 f"http://localhost:{self.remote_debugging_port}"
             )
             self.context = self.browser.contexts[0]
+            self._owns_context = False
+            if self.record_path and not self.replay_path:
+                # the archive is only written when its context closes
+                self.context = await self._new_context(
+                    await self.context.storage_state()
+                )
+                self._owns_context = True
         else:
-            self.browser = await playwright.chromium.launch(
+            self.browser = await self.playwright.chromium.launch(
                 executable_path=find_chrome(),
                 headless=self.headless,
                 args=[
@@ -71,46 +225,239 @@ class BrowserClient:
             )
 
             # Try to load saved state if it exists
-            storage_state = None
-            if self.browser_state_path and os.path.exists(self.browser_state_path):
+            storage_state = self.storage_state
+            if (
+                storage_state is None
+                and self.browser_state_path
+                and os.path.exists(self.browser_state_path)
+            ):
                 logger.info(
                     f"Loading browser state({int(os.stat(self.browser_state_path).st_size / 1024)}KB) from {self.browser_state_path}"
                 )
                 storage_state = self.browser_state_path
 
-            self.context = await self.browser.new_context(
-                user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36",
-                viewport={"width": 1280, "height": 2560},
-                locale="en-US",
-                timezone_id="Asia/Hong_Kong",
-                bypass_csp=True,
-                extra_http_headers={
-                    "Accept-Language": "en-US,en;q=0.9",
-                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-                    "Accept-Encoding": "gzip, deflate, br",
-                    "Connection": "keep-alive",
-                    "DNT": "1",
-                    "Upgrade-Insecure-Requests": "1",
-                },
-                permissions=["geolocation"],
-                storage_state=storage_state,
-            )
-            await self.context.add_init_script(load_js_file("stealth"))
+            self.context = await self._new_context(storage_state)
+
+        if self.replay_path:
+            await replay_har(self.context, self.replay_path)
+        elif self.record_path:
+            await record_har(self.context, self.record_path)
+        await self.blocker.setup_context(self.context)
+
+        self.page_pool = self._new_page_pool()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.context:
+        if self._recycle_task:
+            await self._recycle_task
+        if self.page_pool:
+            await self.page_pool.close()
+        if self.context and self._owns_context:
             await self.context.close()
-        if self.browser:
-            await self.browser.close()
+        if self._owns_browser:
+            if self.browser:
+                await self.browser.close()
+            if self.playwright:
+                await self.playwright.stop()
 
-    async def _setup_page(self, page: Page) -> None:
-        await page.route(
-            "**/*",
-            lambda route: route.abort()
-            if route.request.resource_type in ["image", "media"]
-            else route.continue_(),
+    async def _new_context(
+        self, storage_state: str | dict | None = None
+    ) -> BrowserContext:
+        context = await self.browser.new_context(
+            user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36",
+            viewport={"width": 1280, "height": 2560},
+            locale="en-US",
+            timezone_id="Asia/Hong_Kong",
+            bypass_csp=True,
+            extra_http_headers={
+                "Accept-Language": "en-US,en;q=0.9",
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+                "Accept-Encoding": "gzip, deflate, br",
+                "Connection": "keep-alive",
+                "DNT": "1",
+                "Upgrade-Insecure-Requests": "1",
+            },
+            permissions=["geolocation"],
+            storage_state=storage_state,
         )
+        await context.add_init_script(load_js_file("stealth"))
+        return context
+
+    async def get_storage_state(self) -> dict:
+        """Cookies and local storage of the current context, e.g. to share login"""
+        return await self.context.storage_state()
+
+    # downloads the covers of `notes` outside the browser, with this client's
+    # cookies. Concurrency and bandwidth are separate from visits'.
+    # Returns cover paths keyed by note id.
+    async def download_covers(
+        self,
+        notes: Iterable[Note],
+        cache: CoverCache,
+        concurrency: int = 8,
+        max_bytes_per_second: float | None = None,
+    ) -> Dict[str, str]:
+        async with CoverDownloader(
+            cache,
+            concurrency=concurrency,
+            max_bytes_per_second=max_bytes_per_second,
+            storage_state=await self.get_storage_state(),
+            base_url=self.base_url,
+            playwright=self.playwright,
+        ) as downloader:
+            with self.metrics.timer("download_covers"):
+                return await downloader.download_notes(notes)
+
+    # a client driving a fresh context of this client's browser, logged in
+    # with the same storage state. Use it as an async context manager, exiting
+    # only closes its context.
+    async def new_shard(self) -> "BrowserClient":
+        shard = BrowserClient(
+            remote_debugging_port=self.remote_debugging_port,
+            concurrency=self.concurrency,
+            headless=self.headless,
+            browser_state_path=None,
+            cache=self.cache,
+            index=self.index,
+            adaptive_concurrency=self.limiter.adaptive,
+            max_concurrency=self.limiter.max_limit,
+            retry_policy=self.retry_policy,
+            base_url=self.base_url,
+            recycle_policy=self.recycle_policy,
+        )
+        shard._owns_browser = False
+        shard.metrics = self.metrics
+        shard.traffic = self.traffic
+        shard.blocker = self.blocker
+        shard.playwright = self.playwright
+        shard.browser = self.browser
+        shard.context = await self._new_context(await self.get_storage_state())
+        # only replay is shared, several contexts recording into one archive
+        # would overwrite each other
+        if self.replay_path:
+            shard.replay_path = self.replay_path
+            await replay_har(shard.context, self.replay_path)
+        await self.blocker.setup_context(shard.context)
+        shard.page_pool = shard._new_page_pool()
+        return shard
+
+    def _new_page_pool(self) -> PagePool:
+        return PagePool(
+            self._new_pooled_page,
+            self._reset_pooled_page,
+            size=self.limiter.max_limit,
+        )
+
+    # held by all work using self.context, so recycling can wait for it
+    @asynccontextmanager
+    async def _context_lease(self) -> AsyncIterator[None]:
+        await self._context_ready.wait()
+        self._context_users += 1
+        self._context_idle.clear()
+        try:
+            yield
+        finally:
+            self._context_users -= 1
+            self._context_pages += 1
+            if not self._context_users:
+                self._context_idle.set()
+            await self._maybe_recycle()
+
+    # starts a recycle in the background once the recycle policy is exceeded
+    async def _maybe_recycle(self) -> None:
+        policy = self.recycle_policy
+        if not policy or self._recycle_task or not self._context_ready.is_set():
+            return
+
+        reason = None
+        if policy.max_pages and self._context_pages >= policy.max_pages:
+            reason = f"{self._context_pages} pages loaded"
+        elif (policy.max_memory_mb or policy.max_renderer_mb) and (
+            self._context_pages % policy.check_every == 0
+        ):
+            memory = self.last_memory = await browser_memory(self.browser)
+            if (
+                memory
+                and policy.max_memory_mb
+                and memory.total_mb > policy.max_memory_mb
+            ):
+                reason = f"browser memory {memory.total_mb:.0f}MB"
+            elif (
+                memory
+                and policy.max_renderer_mb
+                and memory.max_renderer_mb > policy.max_renderer_mb
+            ):
+                reason = f"renderer memory {memory.max_renderer_mb:.0f}MB"
+
+        if reason and not self._recycle_task:
+            self._recycle_task = asyncio.ensure_future(self.recycle_context(reason))
+
+    # replaces the context with a fresh one carrying over its cookies and local
+    # storage. New work waits while the work in flight drains.
+    async def recycle_context(self, reason: str = "requested") -> None:
+        async with self._recycle_lock:
+            start = time()
+            self._context_ready.clear()
+            try:
+                await self._context_idle.wait()
+                storage_state = await self.context.storage_state()
+                await self.page_pool.close()
+                old_context = self.context
+                self.context = await self._new_context(storage_state)
+                if self.replay_path:
+                    await replay_har(self.context, self.replay_path)
+                await self.blocker.setup_context(self.context)
+                self.page_pool = self._new_page_pool()
+                if self._owns_context:
+                    await old_context.close()
+                self._owns_context = True
+                pages, self._context_pages = self._context_pages, 0
+                self.recycles += 1
+            finally:
+                self._context_ready.set()
+                self._recycle_task = None
+            self.metrics.observe("recycle", time() - start)
+            logger.info(
+                f"Recycled context after {pages} pages ({reason}) in {time() - start:.1f}s"
+            )
+
+    # pages loaded and open in the current context, recycles so far and the
+    # last browser memory measurement
+    def context_stats(self) -> dict:
+        return {
+            "pages": self._context_pages,
+            "open_pages": len(self.context.pages) if self.context else 0,
+            "recycles": self.recycles,
+            "memory_mb": self.last_memory.total_mb if self.last_memory else None,
+            "max_renderer_mb": self.last_memory.max_renderer_mb
+            if self.last_memory
+            else None,
+        }
+
+    # adds the traffic of one page to the session totals
+    def _record_traffic(self, operation: str, stats: TrafficStats) -> None:
+        self.traffic.setdefault(operation, TrafficStats()).add(stats)
+
+    # all traffic of this session
+    def traffic_total(self) -> TrafficStats:
+        total = TrafficStats()
+        for stats in self.traffic.values():
+            total.add(stats)
+        return total
+
+    async def _setup_page(self, page: Page) -> None:
+        await self.blocker.setup_page(page)
+
+    # pooled pages get their routing set up once, at creation
+    async def _new_pooled_page(self) -> Page:
+        page = await self.context.new_page()
+        await self._setup_page(page)
+        return page
+
+    # drop per-visit state so the page can serve the next note
+    async def _reset_pooled_page(self, page: Page) -> None:
+        await self.blocker.restore(page)
+        await page.goto("about:blank", timeout=5000)
 
     async def process_page(
         self,
@@ -119,9 +466,10 @@ class BrowserClient:
         needs_check_login: bool,
         wait_extra_selector: Optional[str] = None,
         extra_timeout: float = 10000,  # 10 seconds
+        abort_after_selector: bool = True,  # block all requests once rendered
     ):
-        await self._setup_page(page)
-        await page.goto(url, wait_until="domcontentloaded", timeout=15000)
+        with self.metrics.timer("goto"):
+            await page.goto(url, wait_until="domcontentloaded", timeout=15000)
 
         if needs_check_login:
             if not await self._check_login(page):
@@ -129,52 +477,321 @@ class BrowserClient:
 
         if wait_extra_selector:
             # logger.debug(f"Waiting for {wait_extra_selector}")
-            await page.wait_for_selector(wait_extra_selector, timeout=extra_timeout)
-            await page.route("**/*", lambda route: route.abort())
+            with self.metrics.timer("wait_for_selector"):
+                await page.wait_for_selector(wait_extra_selector, timeout=extra_timeout)
+            if abort_after_selector:
+                await self.blocker.block_all(page)
+
+    # comments: pull comments page by page from the comment API, instead of
+    # the few rendered when the note loads
+    # with_comments: False reads the note from the page's initial state as
+    # soon as the document loaded, without waiting for comments to render
+    async def visit_link(
+        self,
+        url_or_result: str | Note,
+        comments: CommentPolicy | None = None,
+        with_comments: bool = True,
+    ) -> Note:
+        return (
+            await self.visit_link_result(url_or_result, comments, with_comments)
+        ).note
+
+    # visits a note, retrying failures per self.retry_policy
+    async def visit_link_result(
+        self,
+        url_or_result: str | Note,
+        comments: CommentPolicy | None = None,
+        with_comments: bool = True,
+    ) -> VisitResult:
+        result = (
+            Note(url=url_or_result) if isinstance(url_or_result, str) else url_or_result
+        )
+        # cached notes only hold the rendered comments
+        if self.cache and result.id and comments is None:
+            cached = self.cache.get(result.id, with_comments=with_comments)
+            if cached:
+                return VisitResult(note=_fill_details(result, cached), status="cached")
+
+        attempts = 0
+        traffic = TrafficStats()
+        while True:
+            attempts += 1
+            failure = await self._visit_once(result, comments, with_comments, traffic)
+            if failure is None:
+                if self.cache:
+                    self.cache.put(
+                        result, with_comments=with_comments or comments is not None
+                    )
+                if self.index:
+                    self.index.add(result)
+                return VisitResult(
+                    note=result, status="ok", attempts=attempts, traffic=traffic
+                )
 
-    async def visit_link(self, url_or_result: str | Note) -> Note:
+            error_kind, error = failure
+            if attempts >= self.retry_policy.attempts_for(error_kind):
+                break
+            delay = self.retry_policy.delay(attempts)
+            logger.info(
+                f"Retry {attempts} in {delay:.1f}s after {error_kind}: {result.url}"
+            )
+            await asyncio.sleep(delay)
+
+        logger.error(
+            f"Error visit {result.title} {result.url} after {attempts} attempts: {error}"
+        )
+        # revalidating an expired entry failed, serve the old copy
+        if self.cache and result.id:
+            stale = self.cache.get(result.id, allow_stale=True)
+            if stale:
+                return VisitResult(
+                    note=_fill_details(result, stale),
+                    status="stale",
+                    error_kind=error_kind,
+                    error=error,
+                    attempts=attempts,
+                    traffic=traffic,
+                )
+        return VisitResult(
+            note=result,
+            status="failed",
+            error_kind=error_kind,
+            error=error,
+            attempts=attempts,
+            traffic=traffic,
+        )
+
+    # a single visit, fills in `result` and returns None, or the failure kind
+    # and message. The page's traffic is added to `traffic` if given.
+    async def _visit_once(
+        self,
+        result: Note,
+        comments: CommentPolicy | None = None,
+        with_comments: bool = True,
+        traffic: TrafficStats | None = None,
+    ) -> tuple[FailureKind, str] | None:
         start_time = time()
-        async with self.semaphore:
+        async with self.limiter, self._context_lease():
             wait_time = time() - start_time
+            self.metrics.observe("limiter_wait", wait_time)
             start_time = time()
 
-            result = (
-                Note(url=url_or_result)
-                if isinstance(url_or_result, str)
-                else url_or_result
-            )
+            page = None
+            collector = None
+            meter = None
+            error_kind = None
             try:
-                page = await self.context.new_page()
-                await self.process_page(
-                    page,
-                    result.url,
-                    needs_check_login=False,
-                    wait_extra_selector=".comments-el .list-container, .no-comments-text",
-                    # async loading comments is slow in some cases, so we wait longer
-                    extra_timeout=20000,
-                )
-                note = await page.evaluate(load_js_file("note_extract"))
+                page = await self.page_pool.acquire()
+                meter = TrafficMeter(page)
+                meter.attach()
+                if comments:
+                    collector = CommentCollector(page, comments)
+                    collector.attach()
+                note = None
+                # rendered comments are only needed without a comment policy
+                if collector or not with_comments:
+                    await self.process_page(page, result.url, needs_check_login=False)
+                    with self.metrics.timer("evaluate"):
+                        note = await page.evaluate(
+                            load_js_file("note_initial_state"), result.id
+                        )
+                    if note is None:
+                        logger.debug(
+                            f"No initial state, waiting to render {result.url}"
+                        )
+                        with self.metrics.timer("wait_for_selector"):
+                            await page.wait_for_selector(
+                                _NOTE_RENDERED_SELECTOR, timeout=20000
+                            )
+                else:
+                    await self.process_page(
+                        page,
+                        result.url,
+                        needs_check_login=False,
+                        wait_extra_selector=_NOTE_RENDERED_SELECTOR,
+                        # async loading comments is slow in some cases, so we wait longer
+                        extra_timeout=20000,
+                        abort_after_selector=collector is None,
+                    )
+                if note is None:
+                    with self.metrics.timer("evaluate"):
+                        note = await page.evaluate(load_js_file("note_extract"))
 
                 if not result.title:
                     result.title = note["title"]
+                if not result.author:
+                    result.author = note["author"] or None
+                if result.like_count is None and note.get("liked_count"):
+                    result.like_count = parse_count(note["liked_count"])
                 result.content = note["content"]
                 result.comments = note["comments"]
                 result.date_string = note["date"]
+                if collector:
+                    collector.note_author = note["author"]
+                    with self.metrics.timer("comments"):
+                        api_comments = [c async for c in collector.stream()]
+                    # e.g. a replayed archive without comment API responses
+                    if api_comments:
+                        result.comments = api_comments
 
                 visit_time = time() - start_time
                 logger.debug(f"{visit_time:.2f}|{wait_time:.2f}s {result.title}")
-                return result
+                self.metrics.observe("visit", visit_time)
+                self.limiter.record(visit_time)
+                if not is_visited(result):
+                    return "empty", "No note details found on the page"
+                return None
             except Exception as e:
-                logger.error(f"Error visit {result.title} {result.url}: {e}")
-                return result
+                error_kind = _classify_error(e)
+                self.metrics.observe("visit_failed", time() - start_time)
+                logger.debug(f"Visit failed ({error_kind}) {result.url}: {e}")
+                self.limiter.record(
+                    time() - start_time,
+                    error=True,
+                    timeout=error_kind in ("timeout", "selector"),
+                )
+                return error_kind, str(e)
             finally:
-                await page.close()
+                if collector:
+                    collector.detach()
+                if meter:
+                    stats = await meter.stop()
+                    self._record_traffic("visit", stats)
+                    if traffic is not None:
+                        traffic.add(stats)
+                if page:
+                    await self.page_pool.release(page, discard=error_kind == "crash")
 
     # will only returns successfully fulfilled notes
-    async def visit_links(self, url_or_notes: List[str | Note]) -> List[Note]:
-        tasks = [self.visit_link(n) for n in url_or_notes]
+    async def visit_links(
+        self,
+        url_or_notes: List[str | Note],
+        comments: CommentPolicy | None = None,
+        with_comments: bool = True,
+    ) -> List[Note]:
+        batch = await self.visit_links_detailed(url_or_notes, comments, with_comments)
+        return [r.note for r in batch.results if r.ok]
+
+    # like visit_links, but returns the outcome of every note and a summary
+    async def visit_links_detailed(
+        self,
+        url_or_notes: List[str | Note],
+        comments: CommentPolicy | None = None,
+        with_comments: bool = True,
+    ) -> VisitBatch:
+        tasks = [
+            self.visit_link_result(n, comments, with_comments) for n in url_or_notes
+        ]
         results = await asyncio.gather(*tasks)
-        return [r for r in results if (r.content or r.comments or r.date_string)]
+        summary = VisitSummary.from_results(results)
+        if summary.total:
+            logger.info(
+                f"Visited {summary.total} notes: {summary.succeeded} ok, "
+                f"{summary.cached} cached, {summary.stale} stale, {summary.failed} failed, "
+                f"{summary.recovered}/{summary.retried} retried recovered, "
+                f"{summary.traffic.bytes_received / 1024:.0f}KB received in "
+                f"{summary.traffic.requests} requests, "
+                f"{summary.traffic.blocked_requests} blocked"
+            )
+        return VisitBatch(results=results, summary=summary)
+
+    # yields successfully visited notes in completion order. A new visit only
+    # starts once the caller takes a result, so at most the current concurrency
+    # limit of results are buffered
+    async def iter_visit_links(
+        self,
+        url_or_notes: Iterable[str | Note],
+        comments: CommentPolicy | None = None,
+        with_comments: bool = True,
+    ) -> AsyncIterator[Note]:
+        items = iter(url_or_notes)
+        pending = set()
+        try:
+            while True:
+                while len(pending) < self.limiter.limit:
+                    item = next(items, None)
+                    if item is None:
+                        break
+                    pending.add(
+                        asyncio.ensure_future(
+                            self.visit_link_result(item, comments, with_comments)
+                        )
+                    )
+                if not pending:
+                    return
+
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    visit = task.result()
+                    if visit.ok:
+                        yield visit.note
+        finally:
+            for task in pending:
+                task.cancel()
+
+    # streams the comments of one note from the comment API as pages arrive.
+    # Holds a page and a concurrency slot until the iteration ends, failures
+    # are raised rather than retried.
+    async def iter_comments(
+        self, url_or_note: str | Note, policy: CommentPolicy | None = None
+    ) -> AsyncIterator[str]:
+        url = url_or_note if isinstance(url_or_note, str) else url_or_note.url
+        async with self.limiter, self._context_lease():
+            page = await self.page_pool.acquire()
+            collector = CommentCollector(page, policy or CommentPolicy())
+            collector.attach()
+            error_kind = None
+            try:
+                await self.process_page(
+                    page,
+                    url,
+                    needs_check_login=False,
+                    wait_extra_selector=_NOTE_RENDERED_SELECTOR,
+                    extra_timeout=20000,
+                    abort_after_selector=False,
+                )
+                collector.note_author = await page.evaluate(
+                    "() => document.querySelector('.author-wrapper .username')"
+                    "?.textContent.trim() || null"
+                )
+                async for comment in collector.stream():
+                    yield comment
+            except Exception as e:
+                error_kind = _classify_error(e)
+                raise
+            finally:
+                collector.detach()
+                await self.page_pool.release(page, discard=error_kind == "crash")
+
+    # returns once more note items are rendered, a feed response completes or
+    # the timeout passes, whichever comes first
+    async def _wait_for_next_batch(
+        self,
+        page: Page,
+        item_count: int,
+        feed_loaded: asyncio.Event,
+        timeout: float,
+    ) -> None:
+        waiters = [
+            asyncio.ensure_future(
+                page.wait_for_function(
+                    f"n => ({_COUNT_NOTE_ITEMS_JS}) > n",
+                    arg=item_count,
+                    timeout=timeout * 1000 + 100,
+                )
+            ),
+            asyncio.ensure_future(feed_loaded.wait()),
+        ]
+        done, pending = await asyncio.wait(
+            waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+        )
+        for waiter in pending:
+            waiter.cancel()
+        # retrieve exceptions so they are not reported as never retrieved
+        for waiter in done:
+            waiter.exception()
 
     # may will returns more than max_results
     async def search(
@@ -185,128 +802,308 @@ class BrowserClient:
         filters: List[
             Callable[[Note], bool]
         ] = [],  # returns True if the webpage should be included
+        capture_api: bool = True,  # read notes from feed API responses if seen
+        scroll_policy: Optional[ScrollPolicy] = None,
+        with_comments: bool = True,  # see visit_link
+        source: SearchSource = "live",
+        max_age: Optional[float] = None,  # of indexed notes, in seconds
     ) -> List[Note]:
-        page = await self.context.new_page()
-        try:
-            url = build_search_url(query)
-            await self.process_page(
-                page,
-                url,
-                # no query will not need login
-                needs_check_login=query is not None,
-                wait_extra_selector=".note-item",
-                extra_timeout=10000,
-            )
+        local = self._search_index(query, max_results, filters, source, max_age)
+        if source == "local" or len(local) >= max_results:
+            return local[:max_results]
 
-            # Initial extraction of notes
-            all_js_notes = await page.evaluate(load_js_file("explore_extract"))
-            all_notes = [_js_note_to_note(note) for note in all_js_notes if note]
-            if filters:
-                all_notes = [n for n in all_notes if all(f(n) for f in filters)]
-
-            seen_urls = set(note.url for note in all_notes)
-
-            # Remove previous request blocking
-            await page.unroute("**/*")
-
-            # Set up selective request blocking:
-            # 1. Allow homefeed API endpoint
-            # 2. Block most other resources to speed up loading
-            async def route_handler(route):
-                if "homefeed" in route.request.url:
-                    await route.continue_()
-                elif route.request.resource_type in [
-                    "image",
-                    "media",
-                    "stylesheet",
-                    "font",
-                    "script",
-                ]:
-                    await route.abort()
-                else:
-                    await route.continue_()
+        notes = await self._collect_live(
+            query, max_results, filters, capture_api, scroll_policy, local
+        )
+        if visit_links:
+            notes = await self.visit_links(notes, with_comments=with_comments)
+        return local + notes
 
-            await page.route(
-                "**/*",
-                route_handler,
+    # same as search, but yields each note as soon as it is ready
+    async def iter_search(
+        self,
+        query: Optional[str],
+        max_results: int = 15,
+        visit_links: bool = False,
+        filters: List[Callable[[Note], bool]] = [],
+        capture_api: bool = True,
+        scroll_policy: Optional[ScrollPolicy] = None,
+        with_comments: bool = True,
+        source: SearchSource = "live",
+        max_age: Optional[float] = None,
+    ) -> AsyncIterator[Note]:
+        local = self._search_index(query, max_results, filters, source, max_age)
+        for note in local[:max_results]:
+            yield note
+        if source == "local" or len(local) >= max_results:
+            return
+
+        notes = await self._collect_live(
+            query, max_results, filters, capture_api, scroll_policy, local
+        )
+        if not visit_links:
+            for note in notes:
+                yield note
+            return
+        async for note in self.iter_visit_links(notes, with_comments=with_comments):
+            yield note
+
+    # the live results topping up `local` to max_results. The notes it already
+    # holds are filtered out while scrolling, so they neither count towards
+    # the scroll target nor get visited again
+    async def _collect_live(
+        self,
+        query: Optional[str],
+        max_results: int,
+        filters: List[Callable[[Note], bool]],
+        capture_api: bool,
+        scroll_policy: Optional[ScrollPolicy],
+        local: List[Note],
+    ) -> List[Note]:
+        shortfall = max_results - len(local)
+        notes = await self._collect_notes(
+            query, shortfall, filters + [_not_in(local)], capture_api, scroll_policy
+        )
+        return notes[:shortfall]
+
+    # indexed notes matching `query`, none for live searches
+    def _search_index(
+        self,
+        query: Optional[str],
+        max_results: int,
+        filters: List[Callable[[Note], bool]],
+        source: SearchSource,
+        max_age: Optional[float],
+    ) -> List[Note]:
+        if source == "live":
+            return []
+        if self.index is None:
+            raise ValueError(f"source={source!r} needs a client with an index")
+        notes = [
+            n
+            for n in self.index.search(query, max_results, max_age)
+            if all(f(n) for f in filters)
+        ]
+        logger.info(f"Found {len(notes)} indexed notes for {query!r}")
+        return notes
+
+    # runs several searches concurrently, each holding a concurrency slot while
+    # it scrolls. A note found by several queries is visited once and shared
+    # by all of them. Returns each query's notes, keyed in the order given.
+    async def search_many(
+        self,
+        queries: Iterable[Optional[str]],
+        max_results: int = 15,  # per query
+        visit_links: bool = False,
+        filters: List[Callable[[Note], bool]] = [],
+        capture_api: bool = True,
+        scroll_policy: Optional[ScrollPolicy] = None,
+        with_comments: bool = True,
+    ) -> Dict[Optional[str], List[Note]]:
+        queries = list(dict.fromkeys(queries))
+
+        async def collect(query: Optional[str]) -> List[Note]:
+            async with self.limiter:
+                return await self._collect_notes(
+                    query, max_results, filters, capture_api, scroll_policy
+                )
+
+        collected = await asyncio.gather(*(collect(q) for q in queries))
+
+        unique: Dict[str, Note] = {}
+        results = {}
+        for query, notes in zip(queries, collected):
+            results[query] = [unique.setdefault(n.id or n.url, n) for n in notes]
+        logger.info(
+            f"Found {len(unique)} unique notes in {sum(map(len, collected))} "
+            f"results for {len(queries)} queries"
+        )
+        if not visit_links:
+            return results
+
+        # visits fill in the notes in place
+        visited = {
+            id(n)
+            for n in await self.visit_links(
+                list(unique.values()), with_comments=with_comments
             )
+        }
+        return {
+            query: [n for n in notes if id(n) in visited]
+            for query, notes in results.items()
+        }
 
-            # Load more if needed
-            max_scroll_attempts = 8  # Increased to get more results
-            scroll_attempts = 0
+    async def _collect_notes(
+        self,
+        query: Optional[str],
+        max_results: int,
+        filters: List[Callable[[Note], bool]],
+        capture_api: bool,
+        scroll_policy: Optional[ScrollPolicy],
+    ) -> List[Note]:
+        async with self._context_lease():
+            search_start = time()
+            page = await self.context.new_page()
+            meter = TrafficMeter(page)
+            meter.attach()
+            try:
+                # notes parsed from feed API responses, drained by every extraction
+                api_js_notes: List[dict] = []
 
-            while (
-                len(all_notes) < max_results and scroll_attempts < max_scroll_attempts
-            ):
-                # Scroll to bottom to trigger loading more
-                await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-
-                # Wait for potential new content to load
-                try:
-                    # Wait a bit for scroll to complete and new items to start loading
-                    await asyncio.sleep(3)  # Increased wait time for API to respond
-
-                    # Extract new batch of notes
-                    new_js_notes = await page.evaluate(load_js_file("explore_extract"))
-                    new_notes = [
-                        _js_note_to_note(note) for note in new_js_notes if note
-                    ]
+                # set whenever a feed API response completes
+                feed_loaded = asyncio.Event()
+
+                async def on_response(response):
+                    source = feed_api_source(response.url)
+                    if not source:
+                        return
+                    try:
+                        if capture_api and response.ok:
+                            api_js_notes.extend(
+                                parse_feed_items(
+                                    await response.json(), source, self.base_url
+                                )
+                            )
+                    except Exception as e:
+                        logger.debug(
+                            f"Failed to parse feed response {response.url}: {e}"
+                        )
+                    finally:
+                        feed_loaded.set()
+
+                page.on("response", on_response)
+
+                # prefer the exact data from feed API responses, fall back to the DOM
+                async def extract_notes() -> List[Note]:
+                    if api_js_notes:
+                        js_notes = api_js_notes.copy()
+                        api_js_notes.clear()
+                    else:
+                        js_notes = await page.evaluate(
+                            "opts => window.__localredExploreExtract(opts)",
+                            {"incremental": True},
+                        )
+                    notes = _js_notes_to_notes(js_notes)
                     if filters:
-                        new_notes = [n for n in new_notes if all(f(n) for f in filters)]
-
-                    # Check if content is different by comparing URLs
-                    current_urls = set(note.url for note in new_notes)
-                    new_urls = current_urls - seen_urls
-
-                    # Add only new, unique notes
-                    new_count = 0
-                    for note in new_notes:
-                        if note.url and note.url in new_urls:
-                            all_notes.append(note)
-                            seen_urls.add(note.url)
-                            new_count += 1
-
-                    logger.debug(
-                        f"Scroll {scroll_attempts + 1}: Added {new_count} new notes, total: {len(all_notes)}"
-                    )
+                        notes = [n for n in notes if all(f(n) for f in filters)]
+                    return notes
+
+                url = build_search_url(query, self.base_url)
+                await self._setup_page(page)
+                await self.process_page(
+                    page,
+                    url,
+                    # no query will not need login
+                    needs_check_login=query is not None,
+                    wait_extra_selector=".note-item",
+                    extra_timeout=10000,
+                )
+                # compile the extractor once for this page. Wrapped so the
+                # function is not the result, evaluate would call it.
+                await page.evaluate(
+                    "() => { window.__localredExploreExtract = "
+                    f"{load_js_file('explore_extract')}; }}"
+                )
+
+                # Initial extraction of notes, deduped by note id (urls differ
+                # in xsec params between the DOM and the API)
+                all_notes = []
+                seen_keys = set()
+                for note in await extract_notes():
+                    if (note.id or note.url) not in seen_keys:
+                        all_notes.append(note)
+                        seen_keys.add(note.id or note.url)
+
+                # Lift the block on all requests so the feed API can load more,
+                # still blocking resources the scrolling does not need
+                await self.blocker.extend(page, _SEARCH_BLOCKED_TYPES)
+
+                # Load more if needed, moving on as soon as a batch shows up
+                policy = scroll_policy or ScrollPolicy()
+                target_count = policy.target_count or max_results
+                deadline = time() + policy.deadline
+                scroll_attempts = 0
+                no_growth = 0
+
+                while (
+                    len(all_notes) < target_count
+                    and scroll_attempts < policy.max_scrolls
+                    and time() < deadline
+                ):
+                    scroll_start = time()
+                    try:
+                        item_count = await page.evaluate(_COUNT_NOTE_ITEMS_JS)
+                        feed_loaded.clear()
+
+                        # Scroll to bottom to trigger loading more
+                        await page.evaluate(
+                            "window.scrollTo(0, document.body.scrollHeight)"
+                        )
+                        with self.metrics.timer("scroll_wait"):
+                            await self._wait_for_next_batch(
+                                page,
+                                item_count,
+                                feed_loaded,
+                                timeout=min(
+                                    policy.idle_timeout, max(deadline - time(), 0)
+                                ),
+                            )
+
+                        # Extract new batch of notes, add only new, unique ones
+                        new_count = 0
+                        for note in await extract_notes():
+                            key = note.id or note.url
+                            if key not in seen_keys:
+                                all_notes.append(note)
+                                seen_keys.add(key)
+                                new_count += 1
+
+                        logger.debug(
+                            f"Scroll {scroll_attempts + 1}: Added {new_count} new notes, total: {len(all_notes)}"
+                        )
 
-                    # If no new notes appeared, try one more time before breaking
-                    if new_count == 0:
                         # Sometimes the site needs another scroll to load more content
-                        if scroll_attempts < max_scroll_attempts - 1:
+                        no_growth = no_growth + 1 if new_count == 0 else 0
+                        if no_growth >= policy.max_no_growth:
                             logger.debug(
-                                "No new results in this batch, trying one more scroll"
+                                f"No new results in {no_growth} scrolls, stopping"
                             )
-                        else:
-                            logger.debug("No new unique results found, stopping")
                             break
 
-                except Exception as e:
-                    logger.debug(f"Error loading more results: {e}")
-                    break
-
-                scroll_attempts += 1
+                    except Exception as e:
+                        logger.debug(f"Error loading more results: {e}")
+                        break
+                    finally:
+                        self.metrics.observe("scroll", time() - scroll_start)
 
-            video_count = sum(1 for note in all_notes if note.is_video)
-            logger.info(
-                f"Found {len(all_notes)} unique results ({video_count} videos) for "
-                + (f"query: {query}" if query else "/explore")
-            )
+                    scroll_attempts += 1
 
-            # Sort notes to prioritize non-video content
-            all_notes = sorted(
-                all_notes,
-                key=lambda x: (x.is_video, -x.like_count),
-            )
+                video_count = sum(1 for note in all_notes if note.is_video)
+                logger.info(
+                    f"Found {len(all_notes)} unique results ({video_count} videos) for "
+                    + (f"query: {query}" if query else "/explore")
+                )
 
-            all_notes = all_notes[:max_results]
+                # Sort notes to prioritize non-video content
+                all_notes = sorted(
+                    all_notes,
+                    key=lambda x: (x.is_video, -(x.like_count or 0)),
+                )
 
-            return await self.visit_links(all_notes) if visit_links else all_notes
-        except Exception as e:
-            logger.error(f"Error during search: {e}\n{traceback.format_exc()}")
-            return []
-        finally:
-            await page.close()
+                return all_notes[:max_results]
+            except Exception as e:
+                logger.error(f"Error during search: {e}\n{traceback.format_exc()}")
+                return []
+            finally:
+                stats = await meter.stop()
+                self._record_traffic("search", stats)
+                logger.info(
+                    f"Search traffic: {stats.requests} requests, "
+                    f"{stats.bytes_received / 1024:.0f}KB received, "
+                    f"{stats.blocked_requests} blocked"
+                )
+                await page.close()
+                self.metrics.observe("search", time() - search_start)
 
     async def _check_login(self, page: Page) -> bool:
         return await page.query_selector(".login-btn") is None
@@ -320,7 +1117,7 @@ class BrowserClient:
         try:
             # Disable image blocking for this page as we need the QR code
             await page.goto(
-                "https://www.xiaohongshu.com/explore",
+                f"{self.base_url}/explore",
                 wait_until="domcontentloaded",
                 timeout=10000,
             )
@@ -379,7 +1176,7 @@ class BrowserClient:
         try:
             # Disable image blocking for this page as we need the QR code
             await page.goto(
-                "https://www.xiaohongshu.com/explore",
+                f"{self.base_url}/explore",
                 wait_until="domcontentloaded",
                 timeout=10000,
             )
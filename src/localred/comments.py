@@ -0,0 +1,144 @@
+import asyncio
+from collections import deque
+from time import time
+from typing import AsyncIterator, List, Tuple
+
+from playwright.async_api import Page
+
+from .models import CommentPolicy
+from .utils import load_js_file, logger
+
+# XHR endpoints a note page loads its comments and replies from
+COMMENT_API_PATH = "/api/sns/web/v2/comment/page"
+SUB_COMMENT_API_PATH = "/api/sns/web/v2/comment/sub/page"
+
+
+def _comment_entry(comment: dict) -> Tuple[str, str, str] | None:
+    user = comment.get("user_info") or {}
+    author = (user.get("nickname") or "").strip()
+    content = (comment.get("content") or "").strip()
+    if not author or not content:
+        return None
+    return comment.get("id") or f"{author}:{content}", author, content
+
+
+# parses a comment API payload into (id, author, content) entries, replies
+# embedded in top level comments included when `sub_comments` is set.
+# Returns the entries and whether the API has more pages.
+def parse_comment_page(
+    payload: dict, sub_comments: bool = False
+) -> Tuple[List[Tuple[str, str, str]], bool]:
+    data = payload.get("data") if isinstance(payload, dict) else None
+    if not data:
+        return [], False
+
+    entries = []
+    for comment in data.get("comments") or []:
+        entry = _comment_entry(comment)
+        if entry:
+            entries.append(entry)
+        if sub_comments:
+            for sub in comment.get("sub_comments") or []:
+                entry = _comment_entry(sub)
+                if entry:
+                    entries.append(entry)
+    return entries, bool(data.get("has_more"))
+
+
+class CommentCollector:
+    """Streams the comments of the note open in `page` from the comment API.
+
+    Attach it before navigating so the first page, which the note loads by
+    itself, is captured too. stream() then scrolls the comment list (and
+    expands replies) to make the page fetch further pages, yielding
+    "author: content" strings as responses arrive instead of scraping the
+    rendered list.
+    """
+
+    def __init__(self, page: Page, policy: CommentPolicy):
+        self.page = page
+        self.policy = policy
+        self.note_author: str | None = None  # comments by the author are skipped
+        self.has_more: bool | None = None  # unknown until the first page
+        self._entries: deque = deque()
+        self._arrived = asyncio.Event()
+        self._seen = set()
+
+    async def _on_response(self, response) -> None:
+        is_sub = SUB_COMMENT_API_PATH in response.url
+        if not is_sub and COMMENT_API_PATH not in response.url:
+            return
+        try:
+            payload = await response.json()
+        except Exception as e:
+            logger.debug(f"Skip unreadable comment response {response.url}: {e}")
+            return
+        entries, has_more = parse_comment_page(
+            payload, sub_comments=self.policy.sub_comments
+        )
+        if not is_sub:
+            self.has_more = has_more
+        self._entries.extend(entries)
+        # set even when a page brought nothing, so stream() stops waiting
+        self._arrived.set()
+
+    def attach(self) -> None:
+        self.page.on("response", self._on_response)
+
+    def detach(self) -> None:
+        self.page.remove_listener("response", self._on_response)
+
+    # scrolls for the next page while there is one, expands replies if asked.
+    # Returns how many reply buttons were clicked.
+    async def _load_more(self) -> int:
+        return await self.page.evaluate(
+            load_js_file("comments_load_more"),
+            {
+                "scroll": self.has_more is not False,
+                "expand": self.policy.sub_comments,
+            },
+        )
+
+    async def stream(self) -> AsyncIterator[str]:
+        policy = self.policy
+        deadline = time() + policy.time_budget
+        yielded = 0
+        loads = 0
+        no_growth = 0
+        while True:
+            self._arrived.clear()
+            grew = False
+            while self._entries:
+                comment_id, author, content = self._entries.popleft()
+                if comment_id in self._seen:
+                    continue
+                self._seen.add(comment_id)
+                if author == self.note_author:
+                    continue
+                grew = True
+                yielded += 1
+                yield f"{author}: {content}"
+                if yielded >= policy.max_comments:
+                    return
+
+            if grew:
+                no_growth = 0
+            elif loads:
+                no_growth += 1
+            if no_growth >= policy.max_no_growth:
+                return
+            remaining = deadline - time()
+            if remaining <= 0:
+                logger.debug(f"Comment time budget spent after {yielded} comments")
+                return
+
+            clicked = await self._load_more()
+            loads += 1
+            if self.has_more is False and not clicked and not self._entries:
+                return
+            try:
+                await asyncio.wait_for(
+                    self._arrived.wait(), min(policy.idle_timeout, remaining)
+                )
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,284 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+from time import monotonic, time
+from typing import Dict, Iterable, List
+from urllib.parse import urljoin, urlparse
+
+from playwright.async_api import APIRequestContext, Playwright, async_playwright
+from pydantic import BaseModel
+
+from .models import Note
+from .utils import DEFAULT_BASE_URL, logger
+
+_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+    "image/avif": ".avif",
+    "image/heic": ".heic",
+}
+# expected size of a cover before any was downloaded
+_DEFAULT_COVER_BYTES = 150 * 1024
+
+
+class CoverCacheStats(BaseModel):
+    hits: int = 0
+    downloads: int = 0
+    deduped: int = 0  # downloads whose content was already stored
+    failures: int = 0
+    evictions: int = 0
+    bytes: int = 0  # currently stored
+
+
+class CoverCache:
+    """Content-addressed image files with a SQLite index of url -> sha256.
+
+    Files live at <directory>/<sha256[:2]>/<sha256><ext>, so the same image
+    behind different urls is stored once. Once more than `max_bytes` are
+    stored the least recently used files are evicted.
+    """
+
+    def __init__(
+        self,
+        directory: str = "~/.localred.covers",
+        max_bytes: int = 2 * 1024**3,
+    ):
+        self.directory = os.path.expanduser(directory)
+        self.max_bytes = max_bytes
+        self.stats = CoverCacheStats()
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._db = sqlite3.connect(os.path.join(self.directory, "index.sqlite"))
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS blobs_accessed_at ON blobs (accessed_at)"
+        )
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                hash TEXT NOT NULL
+            )"""
+        )
+        self._db.commit()
+        (total,) = self._db.execute("SELECT SUM(size) FROM blobs").fetchone()
+        self.stats.bytes = total or 0
+
+    # path of the cached image of `url`, None if not cached
+    def get(self, url: str) -> str | None:
+        row = self._db.execute(
+            "SELECT blobs.hash, blobs.path FROM urls JOIN blobs USING (hash) "
+            "WHERE urls.url = ?",
+            (url,),
+        ).fetchone()
+        if not row or not os.path.exists(os.path.join(self.directory, row[1])):
+            return None
+        self._db.execute(
+            "UPDATE blobs SET accessed_at = ? WHERE hash = ?", (time(), row[0])
+        )
+        self._db.commit()
+        return os.path.join(self.directory, row[1])
+
+    def put(self, url: str, data: bytes, content_type: str | None = None) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        row = self._db.execute(
+            "SELECT path FROM blobs WHERE hash = ?", (digest,)
+        ).fetchone()
+        if row:
+            self.stats.deduped += 1
+            rel_path = row[0]
+        else:
+            ext = _EXTENSIONS.get((content_type or "").split(";")[0].strip())
+            ext = ext or os.path.splitext(urlparse(url).path)[1][:6] or ".img"
+            rel_path = os.path.join(digest[:2], digest + ext)
+            path = os.path.join(self.directory, rel_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self.stats.bytes += len(data)
+
+        self._db.execute(
+            """INSERT INTO blobs (hash, path, size, accessed_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT (hash) DO UPDATE SET accessed_at = excluded.accessed_at""",
+            (digest, rel_path, len(data), time()),
+        )
+        self._db.execute(
+            "INSERT OR REPLACE INTO urls (url, hash) VALUES (?, ?)", (url, digest)
+        )
+        self._db.commit()
+        if self.stats.bytes > self.max_bytes:
+            self._evict(keep=digest)
+        return os.path.join(self.directory, rel_path)
+
+    # evicts the least recently used files, never `keep`, the one just stored
+    def _evict(self, keep: str | None = None) -> None:
+        evicted = 0
+        rows = self._db.execute(
+            "SELECT hash, path, size FROM blobs ORDER BY accessed_at"
+        ).fetchall()
+        for digest, rel_path, size in rows:
+            if self.stats.bytes <= self.max_bytes * 0.9:
+                break
+            if digest == keep:
+                continue
+            try:
+                os.remove(os.path.join(self.directory, rel_path))
+            except FileNotFoundError:
+                pass
+            self._db.execute("DELETE FROM blobs WHERE hash = ?", (digest,))
+            self._db.execute("DELETE FROM urls WHERE hash = ?", (digest,))
+            self.stats.bytes -= size
+            evicted += 1
+        self._db.commit()
+        self.stats.evictions += evicted
+        logger.debug(f"Evicted {evicted} covers from cache")
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class TokenBucket:
+    """Allows `rate` units per second on average, in bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: float | None = None):
+        self.rate = rate
+        self.burst = burst or rate
+        self._tokens = self.burst
+        self._updated = monotonic()
+        self._lock = asyncio.Lock()
+
+    # waits until `amount` units may pass. Amounts above the burst go into debt,
+    # delaying whatever comes next.
+    async def consume(self, amount: float) -> None:
+        async with self._lock:
+            now = monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= amount
+            if self._tokens < 0:
+                await asyncio.sleep(-self._tokens / self.rate)
+
+    # gives back units consumed in excess, e.g. for an overestimated size
+    def refund(self, amount: float) -> None:
+        self._tokens = min(self.burst, self._tokens + amount)
+
+
+class CoverDownloader:
+    """Downloads note covers into a CoverCache over a pooled HTTP client.
+
+    Requests go through a Playwright APIRequestContext, outside the browser
+    and its block policy, sending the cookies of `storage_state`. At most
+    `concurrency` downloads run at once and, with `max_bytes_per_second`,
+    their combined bandwidth is bounded too. Each download is charged its
+    expected size (the average so far) before it starts and settled once its
+    size is known, so bursts stay within about `concurrency` covers. Use it as
+    an async context manager.
+    """
+
+    def __init__(
+        self,
+        cache: CoverCache,
+        concurrency: int = 8,
+        max_bytes_per_second: float | None = None,
+        storage_state: dict | str | None = None,
+        base_url: str = DEFAULT_BASE_URL,  # resolves relative cover urls
+        playwright: Playwright | None = None,  # started and stopped if None
+        timeout: float = 15.0,
+    ):
+        self.cache = cache
+        self.concurrency = concurrency
+        self.storage_state = storage_state
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.bandwidth = (
+            TokenBucket(max_bytes_per_second) if max_bytes_per_second else None
+        )
+        self.playwright = playwright
+        self._owns_playwright = playwright is None
+        self._slots = asyncio.Semaphore(concurrency)
+        self._request: APIRequestContext | None = None
+        self._downloaded_bytes = 0
+        self._downloaded = 0
+
+    def _expected_size(self) -> float:
+        if not self._downloaded:
+            return _DEFAULT_COVER_BYTES
+        return self._downloaded_bytes / self._downloaded
+
+    async def __aenter__(self):
+        if self.playwright is None:
+            self.playwright = await async_playwright().start()
+        self._request = await self.playwright.request.new_context(
+            storage_state=self.storage_state,
+            extra_http_headers={
+                "Referer": f"{self.base_url}/",
+                "Accept": "image/avif,image/webp,image/*,*/*;q=0.8",
+            },
+            timeout=self.timeout * 1000,
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._request:
+            await self._request.dispose()
+        if self._owns_playwright and self.playwright:
+            await self.playwright.stop()
+
+    # path of the cover of `url`, downloading it unless cached. None on failure.
+    async def download(self, url: str) -> str | None:
+        url = urljoin(f"{self.base_url}/", url)
+        path = self.cache.get(url)
+        if path:
+            self.cache.stats.hits += 1
+            return path
+
+        async with self._slots:
+            expected = self._expected_size()
+            if self.bandwidth:
+                await self.bandwidth.consume(expected)
+            try:
+                response = await self._request.get(url)
+                if not response.ok:
+                    raise Exception(f"HTTP {response.status}")
+                data = await response.body()
+            except Exception as e:
+                if self.bandwidth:
+                    self.bandwidth.refund(expected)
+                self.cache.stats.failures += 1
+                logger.debug(f"Failed to download cover {url}: {e}")
+                return None
+            self._downloaded += 1
+            self._downloaded_bytes += len(data)
+            if self.bandwidth:
+                if len(data) > expected:
+                    await self.bandwidth.consume(len(data) - expected)
+                else:
+                    self.bandwidth.refund(expected - len(data))
+        self.cache.stats.downloads += 1
+        return self.cache.put(url, data, response.headers.get("content-type"))
+
+    # downloads the covers of `notes`, each distinct url once. Returns the
+    # cover path of every note that has one, keyed by note id (or url).
+    async def download_notes(self, notes: Iterable[Note]) -> Dict[str, str]:
+        notes = [n for n in notes if n.cover_url]
+        urls: List[str] = list(dict.fromkeys(n.cover_url for n in notes))
+        paths = dict(zip(urls, await asyncio.gather(*map(self.download, urls))))
+        return {
+            note.id or note.url: paths[note.cover_url]
+            for note in notes
+            if paths[note.cover_url]
+        }
@@ -0,0 +1,275 @@
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import random
+import re
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import cache
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, List, Tuple
+
+from .models import Note
+from .utils import logger
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_NON_WORD_RE = re.compile(r"[\W_]+")
+
+Signature = Tuple[int, ...]
+
+
+@cache
+def _permutations(num_perm: int, seed: int) -> Tuple[List[int], List[int]]:
+    rng = random.Random(seed)
+    a = [rng.randrange(1, _MAX_HASH) for _ in range(num_perm)]
+    b = [rng.randrange(0, _MAX_HASH) for _ in range(num_perm)]
+    return a, b
+
+
+def _shingle_hashes(text: str, shingle_size: int) -> List[int]:
+    # case, whitespace and punctuation differences do not make a repost new
+    text = _NON_WORD_RE.sub("", text.lower())
+    if not text:
+        return []
+    shingles = {
+        text[i : i + shingle_size] for i in range(max(1, len(text) - shingle_size + 1))
+    }
+    return [
+        int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), "little")
+        for s in shingles
+    ]
+
+
+# MinHash of the character shingles of `text`, None if it has no words
+def minhash(
+    text: str, num_perm: int = 128, shingle_size: int = 5, seed: int = 1
+) -> Signature | None:
+    hashes = _shingle_hashes(text, shingle_size)
+    if not hashes:
+        return None
+    a, b = _permutations(num_perm, seed)
+    if np is not None:
+        # (a * h + b) stays below 2**64 with 32 bit a, b and h
+        h = np.array(hashes, dtype=np.uint64)[:, None]
+        values = (
+            np.array(a, dtype=np.uint64) * h + np.array(b, dtype=np.uint64)
+        ) % np.uint64(_PRIME)
+        return tuple(int(v) for v in (values & np.uint64(_MAX_HASH)).min(axis=0))
+    return tuple(
+        min((ai * h + bi) % _PRIME & _MAX_HASH for h in hashes) for ai, bi in zip(a, b)
+    )
+
+
+# entry point of worker processes
+def _minhash_batch(
+    texts: List[str], num_perm: int, shingle_size: int, seed: int
+) -> List[Signature | None]:
+    return [minhash(t, num_perm, shingle_size, seed) for t in texts]
+
+
+class NearDuplicateIndex:
+    """LSH index over the MinHash signatures of canonical notes.
+
+    A signature is split into `bands` bands. Notes sharing a band are
+    candidates, and a candidate is a duplicate once the fraction of equal
+    signature values (the estimated Jaccard similarity) reaches `threshold`.
+    Only canonical notes are indexed, so memory grows with the number of
+    distinct notes, and each lookup compares a handful of candidates.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 16, threshold: float = 0.8):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self._buckets: List[Dict[int, List[str]]] = [{} for _ in range(bands)]
+        self._signatures: Dict[str, array] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _band_keys(self, signature: Signature) -> Iterable[Tuple[int, int]]:
+        for band in range(self.bands):
+            yield band, hash(signature[band * self.rows : (band + 1) * self.rows])
+
+    # key of an indexed note similar enough to `signature`, if any
+    def query(self, signature: Signature) -> str | None:
+        checked = set()
+        for band, band_key in self._band_keys(signature):
+            for key in self._buckets[band].get(band_key, ()):
+                if key in checked:
+                    continue
+                checked.add(key)
+                other = self._signatures[key]
+                same = sum(x == y for x, y in zip(signature, other))
+                if same / self.num_perm >= self.threshold:
+                    return key
+        return None
+
+    def add(self, key: str, signature: Signature) -> None:
+        self._signatures[key] = array("I", signature)
+        for band, band_key in self._band_keys(signature):
+            self._buckets[band].setdefault(band_key, []).append(key)
+
+
+def _note_key(note: Note) -> str:
+    return note.id or note.url
+
+
+class Deduper:
+    """Drops near-duplicate notes, e.g. reposts of the same content.
+
+    Signatures are computed in a process pool (`processes=0` computes them in
+    this process), in chunks of `chunk_size` notes. The first note of a
+    cluster becomes its canonical note when streaming, `dedupe` instead keeps
+    the most liked one. `clusters` maps each canonical key to the keys of its
+    duplicates.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,  # estimated Jaccard similarity of duplicates
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle_size: int = 5,
+        with_comments: bool = False,  # include comments in the compared text
+        processes: int | None = None,  # defaults to the number of CPUs
+        chunk_size: int = 256,
+        seed: int = 1,
+    ):
+        self.index = NearDuplicateIndex(num_perm, bands, threshold)
+        self.shingle_size = shingle_size
+        self.with_comments = with_comments
+        self.processes = (os.cpu_count() or 1) if processes is None else processes
+        self.chunk_size = chunk_size
+        self.seed = seed
+        self.clusters: Dict[str, List[str]] = {}
+        self.duplicates = 0
+        self._executor: Executor | None = None
+
+    def _text(self, note: Note) -> str:
+        parts = [note.title or "", note.content or ""]
+        if self.with_comments:
+            parts.extend(note.comments)
+        return "\n".join(parts)
+
+    def _pool(self) -> Executor | None:
+        if self.processes and self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def _args(self, notes: List[Note]) -> tuple:
+        return (
+            [self._text(n) for n in notes],
+            self.index.num_perm,
+            self.shingle_size,
+            self.seed,
+        )
+
+    def signatures(self, notes: List[Note]) -> List[Signature | None]:
+        pool = self._pool()
+        if pool is None:
+            return _minhash_batch(*self._args(notes))
+        chunks = [
+            notes[i : i + self.chunk_size]
+            for i in range(0, len(notes), self.chunk_size)
+        ]
+        futures = [pool.submit(_minhash_batch, *self._args(c)) for c in chunks]
+        return [sig for f in futures for sig in f.result()]
+
+    # the canonical key `note` duplicates, or None after indexing it as new
+    def _assign(self, note: Note, signature: Signature | None) -> str | None:
+        key = _note_key(note)
+        if signature is None:
+            # nothing to compare, e.g. a video note without text
+            return None
+        canonical = self.index.query(signature)
+        if canonical is None or canonical == key:
+            if canonical is None:
+                self.index.add(key, signature)
+                self.clusters[key] = []
+            return None
+        self.clusters[canonical].append(key)
+        self.duplicates += 1
+        return canonical
+
+    # yields the first note of each cluster as soon as its chunk is hashed
+    async def iter_unique(self, notes: AsyncIterable[Note]) -> AsyncIterator[Note]:
+        loop = asyncio.get_running_loop()
+        pool = self._pool()
+
+        async def hash_chunk(chunk):
+            if pool is None:
+                return _minhash_batch(*self._args(chunk))
+            return await loop.run_in_executor(pool, _minhash_batch, *self._args(chunk))
+
+        # the next chunk is hashed while the previous one is being assigned
+        pending = None
+        chunk: List[Note] = []
+
+        async def drain(pending):
+            chunk, task = pending
+            for note, signature in zip(chunk, await task):
+                if self._assign(note, signature) is None:
+                    yield note
+
+        async for note in notes:
+            chunk.append(note)
+            if len(chunk) >= self.chunk_size:
+                previous = pending
+                pending = (chunk, asyncio.ensure_future(hash_chunk(chunk)))
+                chunk = []
+                if previous:
+                    async for unique in drain(previous):
+                        yield unique
+        if chunk:
+            previous = pending
+            pending = (chunk, asyncio.ensure_future(hash_chunk(chunk)))
+            if previous:
+                async for unique in drain(previous):
+                    yield unique
+        if pending:
+            async for unique in drain(pending):
+                yield unique
+
+    # keeps one note per cluster, the most liked (then longest) one
+    def dedupe(self, notes: Iterable[Note]) -> List[Note]:
+        notes = list(notes)
+        best: Dict[str, Note] = {}
+        order: List[str] = []
+        for note, signature in zip(notes, self.signatures(notes)):
+            canonical = self._assign(note, signature) or _note_key(note)
+            if canonical not in best:
+                order.append(canonical)
+                best[canonical] = note
+            elif (note.like_count or 0, len(note.content or "")) > (
+                best[canonical].like_count or 0,
+                len(best[canonical].content or ""),
+            ):
+                best[canonical] = note
+        logger.info(
+            f"Kept {len(order)} of {len(notes)} notes, {len(notes) - len(order)} near duplicates"
+        )
+        return [best[key] for key in order]
+
+    def close(self) -> None:
+        if self._executor:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
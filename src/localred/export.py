@@ -0,0 +1,180 @@
+import asyncio
+import glob
+import gzip
+import json
+import os
+from datetime import datetime
+from typing import AsyncIterable, Iterator, List, Literal
+
+from .models import Note
+from .utils import logger
+
+ExportFormat = Literal["jsonl", "parquet"]
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet export needs pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def _parquet_schema(pa):
+    return pa.schema(
+        [
+            ("id", pa.string()),
+            ("url", pa.string()),
+            ("title", pa.string()),
+            ("author", pa.string()),
+            ("content", pa.string()),
+            ("is_video", pa.bool_()),
+            ("like_count", pa.int64()),
+            ("cover_url", pa.string()),
+            ("date_string", pa.string()),
+            ("comments", pa.list_(pa.string())),
+        ]
+    )
+
+
+class NoteSink:
+    """Appends notes to rotating JSONL or Parquet files as they arrive.
+
+    Notes are buffered and written every `batch_size` notes, and a new file is
+    started every `max_notes_per_file` notes, so memory stays bounded whatever
+    the crawl size. JSONL files are gzip compressed unless `compression` is
+    None; Parquet files use `compression` as the codec (default zstd).
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        format: ExportFormat = "jsonl",
+        prefix: str = "notes",
+        batch_size: int = 100,
+        max_notes_per_file: int = 50_000,
+        compression: str | None = "default",
+    ):
+        if format not in ("jsonl", "parquet"):
+            raise ValueError(f"Unknown export format: {format}")
+        self.directory = os.path.expanduser(directory)
+        self.format = format
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.max_notes_per_file = max_notes_per_file
+        if compression == "default":
+            compression = "gzip" if format == "jsonl" else "zstd"
+        self.compression = compression
+        self.paths: List[str] = []  # files written so far
+        self.count = 0
+
+        self._buffer: List[Note] = []
+        self._file = None
+        self._file_count = 0
+        self._run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if format == "parquet":
+            self._pa = _import_pyarrow()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _open_next(self) -> None:
+        self._close_file()
+        if self.format == "jsonl":
+            ext = ".jsonl.gz" if self.compression == "gzip" else ".jsonl"
+        else:
+            ext = ".parquet"
+        path = os.path.join(
+            self.directory,
+            f"{self.prefix}-{self._run_id}-{len(self.paths):05d}{ext}",
+        )
+        if self.format == "parquet":
+            self._file = self._pa.parquet.ParquetWriter(
+                path, _parquet_schema(self._pa), compression=self.compression
+            )
+        elif self.compression == "gzip":
+            self._file = gzip.open(path, "wt", encoding="utf-8")
+        else:
+            self._file = open(path, "w", encoding="utf-8")
+        self._file_count = 0
+        self.paths.append(path)
+        logger.debug(f"Exporting notes to {path}")
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def write(self, note: Note) -> None:
+        self._buffer.append(note)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        buffer, self._buffer = self._buffer, []
+        while buffer:
+            if self._file is None or self._file_count >= self.max_notes_per_file:
+                self._open_next()
+            batch = buffer[: self.max_notes_per_file - self._file_count]
+            buffer = buffer[len(batch) :]
+            if self.format == "parquet":
+                rows = [n.model_dump() for n in batch]
+                self._file.write_table(
+                    self._pa.Table.from_pylist(rows, schema=_parquet_schema(self._pa))
+                )
+            else:
+                self._file.write("".join(n.model_dump_json() + "\n" for n in batch))
+                self._file.flush()
+            self._file_count += len(batch)
+            self.count += len(batch)
+
+    # drains an async iterator such as BrowserClient.iter_visit_links,
+    # writing batches off the event loop
+    async def consume(self, notes: AsyncIterable[Note]) -> int:
+        written = self.count
+        async for note in notes:
+            self._buffer.append(note)
+            if len(self._buffer) >= self.batch_size:
+                await asyncio.to_thread(self.flush)
+        await asyncio.to_thread(self.flush)
+        return self.count - written
+
+    def close(self) -> None:
+        self.flush()
+        self._close_file()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _export_files(path: str) -> List[str]:
+    path = os.path.expanduser(path)
+    if not os.path.isdir(path):
+        return [path]
+    files = []
+    for pattern in ("*.jsonl", "*.jsonl.gz", "*.parquet"):
+        files.extend(glob.glob(os.path.join(path, pattern)))
+    return sorted(files)
+
+
+def read_notes(path: str, batch_size: int = 1000) -> Iterator[Note]:
+    """Streams notes back from an export file or directory of them."""
+    for file in _export_files(path):
+        if file.endswith(".parquet"):
+            pq = _import_pyarrow().parquet
+            for batch in pq.ParquetFile(file).iter_batches(batch_size=batch_size):
+                yield from Note.from_dicts(batch.to_pylist())
+            continue
+
+        opener = gzip.open if file.endswith(".gz") else open
+        with opener(file, "rt", encoding="utf-8") as f:
+            lines = []
+            for line in f:
+                if line.strip():
+                    lines.append(json.loads(line))
+                if len(lines) >= batch_size:
+                    yield from Note.from_dicts(lines)
+                    lines = []
+            yield from Note.from_dicts(lines)
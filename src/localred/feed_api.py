@@ -0,0 +1,64 @@
+from typing import List
+
+from .utils import DEFAULT_BASE_URL, logger, parse_count
+
+# XHR endpoints the explore and search pages load their note lists from
+FEED_API_PATHS = {
+    "/api/sns/web/v1/homefeed": "pc_feed",
+    "/api/sns/web/v1/search/notes": "pc_search",
+}
+
+
+def feed_api_source(url: str) -> str | None:
+    """Return the xsec_source of a feed API url, None if it is not one."""
+    for path, source in FEED_API_PATHS.items():
+        if path in url:
+            return source
+    return None
+
+
+def _cover_url(cover: dict) -> str:
+    if not cover:
+        return ""
+    if cover.get("url_default") or cover.get("url"):
+        return cover.get("url_default") or cover.get("url")
+    for info in cover.get("info_list") or []:
+        if info.get("url"):
+            return info["url"]
+    return ""
+
+
+# converts a feed API payload into the same dicts explore_extract.js returns
+def parse_feed_items(
+    payload: dict, source: str = "pc_feed", base_url: str = DEFAULT_BASE_URL
+) -> List[dict]:
+    data = payload.get("data") if isinstance(payload, dict) else None
+    if not data:
+        return []
+
+    js_notes = []
+    for item in data.get("items") or []:
+        note_card = item.get("note_card")
+        if not item.get("id") or not note_card:
+            # ads, hot queries and other non-note cards
+            continue
+        try:
+            url = f"{base_url}/explore/{item['id']}"
+            if item.get("xsec_token"):
+                url += f"?xsec_token={item['xsec_token']}&xsec_source={source}"
+            user = note_card.get("user") or {}
+            interact_info = note_card.get("interact_info") or {}
+            like_count = parse_count(interact_info.get("liked_count"))
+            js_notes.append(
+                {
+                    "url": url,
+                    "title": note_card.get("display_title") or "",
+                    "author": user.get("nickname") or user.get("nick_name") or "",
+                    "like_count_num": like_count if like_count is not None else -1,
+                    "cover_url": _cover_url(note_card.get("cover")),
+                    "is_video": note_card.get("type") == "video",
+                }
+            )
+        except Exception as e:
+            logger.debug(f"Skip unparsable feed item {item.get('id')}: {e}")
+    return js_notes
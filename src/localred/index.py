@@ -0,0 +1,129 @@
+import os
+import sqlite3
+from time import time
+from typing import List
+
+from .models import Note
+from .utils import logger
+
+_COLUMNS = ("title", "content", "author", "comments")
+
+
+def _fts_phrase(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+class NoteIndex:
+    """Full-text index of visited notes, backed by SQLite FTS5.
+
+    The trigram tokenizer matches any substring of three or more characters,
+    which works for Chinese text without a word segmenter. Shorter terms,
+    such as most two character Chinese words, fall back to LIKE on the
+    matched rows. Notes are upserted by Note.id, so revisits refresh them.
+    """
+
+    def __init__(self, path: str = "~/.localred.index.sqlite"):
+        self.path = os.path.expanduser(path)
+        self._db = sqlite3.connect(self.path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS notes (
+                rowid INTEGER PRIMARY KEY,
+                id TEXT NOT NULL UNIQUE,
+                data TEXT NOT NULL,
+                indexed_at REAL NOT NULL
+            )"""
+        )
+        self._db.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5("
+            f"{', '.join(_COLUMNS)}, tokenize='trigram')"
+        )
+        self._db.commit()
+
+    def __len__(self) -> int:
+        (count,) = self._db.execute("SELECT COUNT(*) FROM notes").fetchone()
+        return count
+
+    def add(self, note: Note) -> None:
+        self.add_many([note])
+
+    def add_many(self, notes: List[Note]) -> None:
+        now = time()
+        for note in notes:
+            if not note.id:
+                continue
+            (rowid,) = self._db.execute(
+                """INSERT INTO notes (id, data, indexed_at) VALUES (?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    data = excluded.data, indexed_at = excluded.indexed_at
+                RETURNING rowid""",
+                (note.id, note.model_dump_json(exclude={"id"}), now),
+            ).fetchone()
+            self._db.execute("DELETE FROM notes_fts WHERE rowid = ?", (rowid,))
+            self._db.execute(
+                f"INSERT INTO notes_fts (rowid, {', '.join(_COLUMNS)}) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    rowid,
+                    note.title or "",
+                    note.content or "",
+                    note.author or "",
+                    "\n".join(note.comments),
+                ),
+            )
+        self._db.commit()
+
+    # notes matching every whitespace separated term of `query`, best matches
+    # first. None matches every note, most recently indexed first.
+    # max_age: only notes indexed within that many seconds
+    def search(
+        self,
+        query: str | None,
+        max_results: int = 15,
+        max_age: float | None = None,
+    ) -> List[Note]:
+        terms = (query or "").split()
+        long_terms = [t for t in terms if len(t) >= 3]
+        short_terms = [t for t in terms if len(t) < 3]
+
+        where = []
+        params: list = []
+        if long_terms:
+            where.append("notes_fts MATCH ?")
+            params.append(" AND ".join(map(_fts_phrase, long_terms)))
+        for term in short_terms:
+            where.append(
+                "("
+                + " OR ".join(f"notes_fts.{c} LIKE ? ESCAPE '\\'" for c in _COLUMNS)
+                + ")"
+            )
+            params.extend([_like_pattern(term)] * len(_COLUMNS))
+        if max_age is not None:
+            where.append("notes.indexed_at >= ?")
+            params.append(time() - max_age)
+
+        sql = (
+            "SELECT notes.id, notes.data FROM notes_fts "
+            "JOIN notes ON notes.rowid = notes_fts.rowid"
+        )
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY " + ("bm25(notes_fts), " if long_terms else "")
+        sql += "notes.indexed_at DESC LIMIT ?"
+        params.append(max_results)
+
+        rows = self._db.execute(sql, params).fetchall()
+        logger.debug(f"Index matched {len(rows)} notes for {query!r}")
+        return [Note.model_validate_json(data) for _, data in rows]
+
+    # reopen the same database when sent to a worker process
+    def __reduce__(self):
+        return (NoteIndex, (self.path,))
+
+    def close(self) -> None:
+        self._db.close()
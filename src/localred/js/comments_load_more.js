@@ -0,0 +1,20 @@
+({ scroll = true, expand = false } = {}) => {
+    // expand visible "show more replies" buttons, returns how many were clicked
+    let clicked = 0;
+    if (expand) {
+        document.querySelectorAll('.comments-el .show-more').forEach(el => {
+            if (el.offsetParent !== null) {
+                el.click();
+                clicked++;
+            }
+        });
+    }
+
+    // the comment list loads its next page when scrolled to the bottom
+    if (scroll) {
+        const scroller = document.querySelector('.note-scroller') || document.scrollingElement;
+        scroller.scrollTop = scroller.scrollHeight;
+        window.scrollTo(0, document.body.scrollHeight);
+    }
+    return clicked;
+}
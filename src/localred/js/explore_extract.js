@@ -1,4 +1,9 @@
-() => {
+(opts = {}) => {
+    // incremental: only return notes not emitted by a previous call. Emitted
+    // nodes are marked with their url, so nodes recycled by the feed for
+    // another note are picked up again.
+    const incremental = !!opts.incremental;
+
     /**
      * Convert formatted like count string to number
      * Handles formats like "10+", "1千+", "1万+" (Chinese numerals)
@@ -38,6 +43,12 @@
             if (!url) {
                 continue;
             }
+            if (incremental) {
+                if (note.dataset.localredUrl === url) {
+                    continue;
+                }
+                note.dataset.localredUrl = url;
+            }
 
             const coverImgEl = note.querySelector("img");
 
@@ -61,6 +72,8 @@
     }
 
     const videoCount = results.filter((r) => r.is_video).length;
-    console.log(`Found ${results.length} total results (${videoCount} videos)`);
+    console.log(
+        `Found ${results.length} ${incremental ? "new" : "total"} results (${videoCount} videos)`
+    );
     return results;
 }
\ No newline at end of file
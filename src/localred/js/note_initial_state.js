@@ -0,0 +1,47 @@
+(noteId) => {
+    // the server rendered state, made reactive once the app hydrates
+    const unref = (value) => {
+        if (value && typeof value === 'object') {
+            if ('_rawValue' in value) return value._rawValue;
+            if ('_value' in value) return value._value;
+            if (value.__v_isRef) return value.value;
+        }
+        return value;
+    };
+
+    const formatDate = (ms) => {
+        if (!ms) return '';
+        const d = new Date(ms);
+        const pad = (n) => String(n).padStart(2, '0');
+        return `${d.getFullYear()}-${pad(d.getMonth() + 1)}-${pad(d.getDate())}`;
+    };
+
+    try {
+        const state = window.__INITIAL_STATE__;
+        const detailMap = unref(state && state.note && state.note.noteDetailMap);
+        if (!detailMap) return null;
+
+        let entry = unref(detailMap[noteId]);
+        if (!entry) {
+            entry = Object.values(detailMap).map(unref).find(e => e && e.note && e.note.noteId);
+        }
+        const note = entry && unref(entry.note);
+        if (!note || !note.noteId) return null;
+
+        const user = unref(note.user) || {};
+        const interactInfo = unref(note.interactInfo) || {};
+        return {
+            title: note.title || '',
+            author: user.nickname || user.nickName || '',
+            // topics are stored as "#topic[话题]#", the page shows "#topic"
+            content: (note.desc || '').replace(/#([^#\[\]]+)\[[^\]]*\]#/g, '#$1').trim(),
+            date: formatDate(note.time || note.lastUpdateTime),
+            liked_count: interactInfo.likedCount || '',
+            is_video: note.type === 'video',
+            comments: [],
+        };
+    } catch (e) {
+        console.error('Error reading initial state:', e);
+        return null;
+    }
+}
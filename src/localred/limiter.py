@@ -0,0 +1,159 @@
+import asyncio
+from collections import deque
+from time import time
+from typing import Deque, List, Literal
+
+from pydantic import BaseModel
+
+from .utils import logger
+
+
+class LimiterDecision(BaseModel):
+    at: float
+    action: Literal["increase", "decrease", "hold"]
+    limit: int
+    p95: float  # seconds, of the window the decision was based on
+    baseline_p95: float
+    error_rate: float
+    timeout_rate: float
+
+
+class ConcurrencyLimiter:
+    """Bounds the number of parallel visits, like an asyncio.Semaphore.
+
+    With `adaptive=True` the limit is tuned AIMD-style from the outcomes
+    reported through `record`: after every `window` visits the limit grows by
+    one while p95 latency stays within `latency_tolerance` of the best p95 seen
+    and errors stay below `max_error_rate`, otherwise it is multiplied by
+    `backoff`.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        adaptive: bool = False,
+        min_limit: int = 1,
+        max_limit: int | None = None,
+        window: int = 20,
+        latency_tolerance: float = 1.5,
+        max_error_rate: float = 0.1,
+        backoff: float = 0.7,
+    ):
+        self.adaptive = adaptive
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit or limit, limit)
+        self.window = window
+        self.latency_tolerance = latency_tolerance
+        self.max_error_rate = max_error_rate
+        self.backoff = backoff
+        self.decisions: Deque[LimiterDecision] = deque(maxlen=100)
+
+        self._limit = limit
+        self._in_flight = 0
+        self._condition = asyncio.Condition()
+        self._latencies: List[float] = []
+        self._errors = 0
+        self._timeouts = 0
+        self._baseline_p95: float | None = None
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self._limit)
+            self._in_flight += 1
+
+    async def release(self) -> None:
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.release()
+
+    # report how long a visit took and how it ended
+    def record(self, latency: float, error: bool = False, timeout: bool = False):
+        if not self.adaptive:
+            return
+        self._latencies.append(latency)
+        self._errors += error or timeout
+        self._timeouts += timeout
+        if len(self._latencies) >= self.window:
+            self._decide()
+
+    def _decide(self) -> None:
+        latencies = sorted(self._latencies)
+        p95 = latencies[int(0.95 * (len(latencies) - 1))]
+        error_rate = self._errors / len(latencies)
+        timeout_rate = self._timeouts / len(latencies)
+        self._latencies, self._errors, self._timeouts = [], 0, 0
+
+        if self._baseline_p95 is None or p95 < self._baseline_p95:
+            self._baseline_p95 = p95
+        else:
+            # drift up slowly so a permanently slower network is not
+            # mistaken for overload forever
+            self._baseline_p95 *= 1.05
+
+        if (
+            error_rate > self.max_error_rate
+            or p95 > self._baseline_p95 * self.latency_tolerance
+        ):
+            action = "decrease"
+            new_limit = max(self.min_limit, int(self._limit * self.backoff))
+        else:
+            action = "increase"
+            new_limit = min(self.max_limit, self._limit + 1)
+        if new_limit == self._limit:
+            action = "hold"
+
+        decision = LimiterDecision(
+            at=time(),
+            action=action,
+            limit=new_limit,
+            p95=p95,
+            baseline_p95=self._baseline_p95,
+            error_rate=error_rate,
+            timeout_rate=timeout_rate,
+        )
+        self.decisions.append(decision)
+        if action != "hold":
+            logger.debug(
+                f"Concurrency {self._limit} -> {new_limit} "
+                f"(p95 {p95:.2f}s, baseline {self._baseline_p95:.2f}s, errors {error_rate:.0%})"
+            )
+        self._set_limit(new_limit)
+
+    def _set_limit(self, limit: int) -> None:
+        grew = limit > self._limit
+        self._limit = limit
+        # a shrink takes effect as running visits end, a growth needs waiters woken
+        if grew:
+            asyncio.ensure_future(self._notify())
+
+    async def _notify(self) -> None:
+        async with self._condition:
+            self._condition.notify_all()
+
+    def snapshot(self) -> dict:
+        return {
+            "limit": self._limit,
+            "in_flight": self._in_flight,
+            "adaptive": self.adaptive,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "baseline_p95": self._baseline_p95,
+            "last_decision": self.decisions[-1].model_dump()
+            if self.decisions
+            else None,
+        }
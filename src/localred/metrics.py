@@ -0,0 +1,117 @@
+import json
+from collections import deque
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Callable, Deque, Dict, Iterator, List
+
+from pydantic import BaseModel
+
+from .utils import logger
+
+# called with the metric name and the observed value
+MetricsHook = Callable[[str, float], None]
+
+
+class HistogramSnapshot(BaseModel):
+    count: int
+    sum: float
+    min: float
+    max: float
+    p50: float
+    p95: float
+    p99: float
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+class Histogram:
+    """Exact count and sum, percentiles over the last `max_samples` values."""
+
+    def __init__(self, max_samples: int = 10_000):
+        self.count = 0
+        self.sum = 0.0
+        self._samples: Deque[float] = deque(maxlen=max_samples)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self._samples.append(value)
+
+    def snapshot(self) -> HistogramSnapshot:
+        samples = sorted(self._samples)
+
+        def percentile(q: float) -> float:
+            return samples[int(q * (len(samples) - 1))] if samples else 0.0
+
+        return HistogramSnapshot(
+            count=self.count,
+            sum=self.sum,
+            min=samples[0] if samples else 0.0,
+            max=samples[-1] if samples else 0.0,
+            p50=percentile(0.5),
+            p95=percentile(0.95),
+            p99=percentile(0.99),
+        )
+
+
+class Metrics:
+    """In-process histograms of per-phase timings, in seconds.
+
+    Hooks added with `add_hook` see every observation as it happens, e.g. to
+    forward them to another metrics system.
+    """
+
+    def __init__(self, max_samples: int = 10_000):
+        self.max_samples = max_samples
+        self._histograms: Dict[str, Histogram] = {}
+        self._hooks: List[MetricsHook] = []
+
+    def add_hook(self, hook: MetricsHook) -> None:
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook: MetricsHook) -> None:
+        self._hooks.remove(hook)
+
+    def observe(self, name: str, value: float) -> None:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            histogram = self._histograms[name] = Histogram(self.max_samples)
+        histogram.observe(value)
+        for hook in self._hooks:
+            try:
+                hook(name, value)
+            except Exception as e:
+                logger.debug(f"Metrics hook failed for {name}: {e}")
+
+    # times the block, also when it raises
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, perf_counter() - start)
+
+    def snapshot(self) -> Dict[str, HistogramSnapshot]:
+        return {name: h.snapshot() for name, h in sorted(self._histograms.items())}
+
+    def reset(self) -> None:
+        self._histograms.clear()
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {name: s.model_dump() for name, s in self.snapshot().items()}, indent=2
+        )
+
+    def to_prometheus(self, prefix: str = "localred") -> str:
+        lines = []
+        for name, s in self.snapshot().items():
+            metric = f"{prefix}_{name}_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for quantile, value in (("0.5", s.p50), ("0.95", s.p95), ("0.99", s.p99)):
+                lines.append(f'{metric}{{quantile="{quantile}"}} {value}')
+            lines.append(f"{metric}_sum {s.sum}")
+            lines.append(f"{metric}_count {s.count}")
+        return "\n".join(lines) + "\n"
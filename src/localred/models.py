@@ -1,7 +1,10 @@
+import random
 import re
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 
-from pydantic import BaseModel, computed_field
+from pydantic import BaseModel, TypeAdapter, computed_field
+
+_NOTE_ID_RE = re.compile(r"/explore/([a-zA-Z0-9]+)")
 
 
 class Note(BaseModel):
@@ -20,11 +23,21 @@ class Note(BaseModel):
     @property
     def id(self) -> Optional[str]:
         """Extract the note ID from the Xiaohongshu URL."""
+        # parsed once per url, the result is cached next to the fields
+        cached = self.__dict__.get("_parsed_id")
+        if cached and cached[0] is self.url:
+            return cached[1]
         # Extract ID from URL path (between /explore/ and any query params)
-        match = re.search(r"/explore/([a-zA-Z0-9]+)", self.url)
-        if match:
-            return match.group(1)
-        return None
+        match = _NOTE_ID_RE.search(self.url)
+        note_id = match.group(1) if match else None
+        self.__dict__["_parsed_id"] = (self.url, note_id)
+        return note_id
+
+    # validates a whole list of dicts in one call, much faster than one
+    # Note(**d) per dict for large batches
+    @classmethod
+    def from_dicts(cls, dicts: List[dict]) -> List["Note"]:
+        return _NOTE_LIST_ADAPTER.validate_python(dicts)
 
     # generate markdown string
     # truncate: reduce the content if needed
@@ -63,3 +76,190 @@ class Note(BaseModel):
             lines.append("*No comments available*")
 
         return "\n".join(lines)
+
+
+_NOTE_LIST_ADAPTER = TypeAdapter(List[Note])
+
+
+class ScrollPolicy(BaseModel):
+    """When search stops scrolling for more results."""
+
+    target_count: Optional[int] = None  # defaults to max_results
+    max_scrolls: int = 8
+    max_no_growth: int = 2  # consecutive scrolls without new notes
+    deadline: float = 30.0  # seconds for all scrolls of one search
+    idle_timeout: float = 1.5  # max seconds to wait for a batch after a scroll
+
+
+class CommentPolicy(BaseModel):
+    """How many comments a visit pulls from the comment API."""
+
+    max_comments: int = 200  # per note, sub-comments included
+    sub_comments: bool = False  # also expand replies
+    time_budget: float = 20.0  # seconds per note, after the note rendered
+    max_no_growth: int = 2  # consecutive loads without new comments
+    idle_timeout: float = 2.0  # max seconds to wait for a page after a load
+
+
+class BlockPolicy(BaseModel):
+    """Requests pages do not make, decided in the browser rather than in Python.
+
+    Patterns use "*" wildcards matching any characters, e.g. "*.doubleclick.net/*",
+    and are not anchored: a url matches when the parts between the wildcards
+    appear in it in order, anywhere. This is how Chromium matches
+    Network.setBlockedURLs, and route mode matches the same way.
+
+    route mode installs a single narrow route per context, so only blocked
+    requests reach Python, once each. cdp mode blocks through
+    Network.setBlockedURLs and cannot express allow patterns, and the Network
+    domain it enables sends every network event of a page to Python. auto
+    picks route.
+    """
+
+    resource_types: List[str] = ["image", "media"]  # see blocking.RESOURCE_PATTERNS
+    url_patterns: List[str] = []
+    allow: List[str] = []  # never blocked, wins over the above
+    mode: Literal["auto", "cdp", "route"] = "auto"
+
+
+class RecyclePolicy(BaseModel):
+    """When a long running client replaces its browser context with a fresh one."""
+
+    max_pages: Optional[int] = 2000  # pages loaded in one context
+    max_memory_mb: Optional[float] = 3072  # RSS of all browser processes
+    max_renderer_mb: Optional[float] = 1024  # RSS of the largest renderer
+    check_every: int = 50  # pages between two memory checks
+
+
+# why a visit failed:
+# - timeout: the page did not load in time
+# - selector: the page loaded but the note never rendered
+# - navigation: network or HTTP level failure
+# - crash: the page or browser crashed or was closed
+# - empty: the page rendered but nothing could be extracted
+# - error: anything else
+FailureKind = Literal["timeout", "selector", "navigation", "crash", "empty", "error"]
+
+
+class RetryPolicy(BaseModel):
+    """How often and how fast a failed visit is retried, per failure kind."""
+
+    max_attempts: Dict[FailureKind, int] = {
+        "timeout": 3,
+        "selector": 2,
+        "navigation": 3,
+        "crash": 3,
+        "empty": 2,
+        "error": 1,
+    }
+    base_delay: float = 1.0  # seconds before the first retry
+    multiplier: float = 2.0
+    max_delay: float = 30.0
+    jitter: float = 0.2  # +-20% randomization of each delay
+
+    def attempts_for(self, kind: FailureKind) -> int:
+        return self.max_attempts.get(kind, 1)
+
+    # delay before the retry following `attempt` (1-based)
+    def delay(self, attempt: int) -> float:
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+class ResourceTraffic(BaseModel):
+    requests: int = 0
+    bytes_received: int = 0  # encoded, headers included
+    bytes_sent: int = 0
+
+
+class TrafficStats(BaseModel):
+    """Requests made by pages and their encoded bytes, by resource type."""
+
+    allowed: Dict[str, ResourceTraffic] = {}  # requests that finished
+    failed: Dict[str, int] = {}  # allowed requests that failed, no bytes counted
+    blocked: Dict[str, int] = {}  # requests dropped by the block policy
+
+    @property
+    def requests(self) -> int:
+        return sum(t.requests for t in self.allowed.values())
+
+    @property
+    def bytes_received(self) -> int:
+        return sum(t.bytes_received for t in self.allowed.values())
+
+    @property
+    def bytes_sent(self) -> int:
+        return sum(t.bytes_sent for t in self.allowed.values())
+
+    @property
+    def blocked_requests(self) -> int:
+        return sum(self.blocked.values())
+
+    # adds the counts of `other` to these, in place
+    def add(self, other: "TrafficStats") -> "TrafficStats":
+        for kind, traffic in other.allowed.items():
+            total = self.allowed.setdefault(kind, ResourceTraffic())
+            total.requests += traffic.requests
+            total.bytes_received += traffic.bytes_received
+            total.bytes_sent += traffic.bytes_sent
+        for counts, other_counts in (
+            (self.failed, other.failed),
+            (self.blocked, other.blocked),
+        ):
+            for kind, count in other_counts.items():
+                counts[kind] = counts.get(kind, 0) + count
+        return self
+
+
+class VisitResult(BaseModel):
+    note: Note
+    # cached: served from the cache, stale: revisiting failed so an expired
+    # cache entry was served
+    status: Literal["ok", "cached", "stale", "failed"]
+    error_kind: Optional[FailureKind] = None  # of the last failed attempt
+    error: Optional[str] = None
+    attempts: int = 0  # browser visits made, 0 for fresh cache hits
+    traffic: Optional[TrafficStats] = None  # of all attempts, None for cache hits
+
+    @property
+    def ok(self) -> bool:
+        return self.status != "failed"
+
+
+class VisitSummary(BaseModel):
+    total: int = 0
+    succeeded: int = 0  # visited, including after retries
+    cached: int = 0
+    stale: int = 0
+    failed: int = 0
+    retried: int = 0  # notes that needed more than one attempt
+    recovered: int = 0  # retried notes that eventually succeeded
+    failures: Dict[FailureKind, int] = {}  # failed notes by last failure kind
+    traffic: TrafficStats = TrafficStats()  # of all visits
+
+    @classmethod
+    def from_results(cls, results: List[VisitResult]) -> "VisitSummary":
+        summary = cls(total=len(results))
+        for r in results:
+            if r.traffic:
+                summary.traffic.add(r.traffic)
+            if r.status == "ok":
+                summary.succeeded += 1
+            elif r.status == "cached":
+                summary.cached += 1
+            elif r.status == "stale":
+                summary.stale += 1
+            else:
+                summary.failed += 1
+                summary.failures[r.error_kind] = (
+                    summary.failures.get(r.error_kind, 0) + 1
+                )
+            if r.attempts > 1:
+                summary.retried += 1
+                summary.recovered += r.status == "ok"
+        return summary
+
+
+class VisitBatch(BaseModel):
+    results: List[VisitResult]
+    summary: VisitSummary
@@ -0,0 +1,213 @@
+import asyncio
+import hashlib
+import inspect
+import json
+import math
+import os
+from time import time
+from typing import Awaitable, Callable, Iterable, List, Optional
+
+from .client import BrowserClient
+from .export import NoteSink
+from .models import CommentPolicy, Note, ScrollPolicy
+from .utils import logger
+
+
+class BloomFilter:
+    """Fixed size set membership, no false negatives, `error_rate` false
+    positives until `capacity` keys were added."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self.bits = bytearray((self.size + 7) // 8)
+
+    # double hashing over one 128 bit digest
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key)
+        )
+
+
+class SeenSet:
+    """Note ids seen before, persisted to `path`.
+
+    Memory is bounded by keeping two Bloom filters: once the current one holds
+    `capacity` ids it becomes the previous one and a fresh one starts, so ids
+    older than about two capacities are forgotten rather than raising the false
+    positive rate. A false positive means a new note is skipped.
+    """
+
+    def __init__(
+        self,
+        path: str | None = "~/.localred.seen.bloom",  # None keeps it in memory
+        capacity: int = 100_000,
+        error_rate: float = 0.001,
+    ):
+        self.path = os.path.expanduser(path) if path else None
+        self.current = BloomFilter(capacity, error_rate)
+        self.previous: BloomFilter | None = None
+        if self.path and os.path.exists(self.path):
+            self._load()
+
+    def _load(self) -> None:
+        with open(self.path, "rb") as f:
+            header = json.loads(f.readline())
+            filters = []
+            for count in header["counts"]:
+                bloom = BloomFilter(header["capacity"], header["error_rate"])
+                bloom.bits = bytearray(f.read(len(bloom.bits)))
+                bloom.count = count
+                filters.append(bloom)
+        self.current = filters[0]
+        self.previous = filters[1] if len(filters) > 1 else None
+        logger.debug(f"Loaded {len(self)} seen ids from {self.path}")
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        filters = [self.current] + ([self.previous] if self.previous else [])
+        header = {
+            "capacity": self.current.capacity,
+            "error_rate": self.current.error_rate,
+            "counts": [f.count for f in filters],
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(json.dumps(header).encode() + b"\n")
+            for bloom in filters:
+                f.write(bloom.bits)
+        os.replace(tmp_path, self.path)
+
+    def add(self, key: str) -> None:
+        if self.current.count >= self.current.capacity:
+            self.previous = self.current
+            self.current = BloomFilter(self.current.capacity, self.current.error_rate)
+        self.current.add(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.current or (
+            self.previous is not None and key in self.previous
+        )
+
+    def __len__(self) -> int:
+        return self.current.count + (self.previous.count if self.previous else 0)
+
+
+NoteCallback = Callable[[Note], Awaitable[None] | None]
+
+
+def _seen_key(note: Note) -> str:
+    return note.id or note.url
+
+
+class Monitor:
+    """Polls the explore feed or a set of queries, emitting only new notes.
+
+    Seen notes are filtered out while scrolling, so a poll stops scrolling once
+    it only finds notes it has seen (per scroll_policy.max_no_growth), and only
+    new notes are visited. A note is marked seen once it was emitted, notes
+    that failed to visit come back in the next poll.
+    """
+
+    def __init__(
+        self,
+        client: BrowserClient,
+        queries: List[Optional[str]] = [None],  # None polls /explore
+        interval: float = 300.0,  # seconds between the starts of two polls
+        max_results: int = 30,  # new notes per query and poll
+        visit: bool = True,
+        on_note: NoteCallback | None = None,
+        sink: NoteSink | None = None,
+        seen: SeenSet | None = None,
+        scroll_policy: ScrollPolicy | None = None,
+        comments: CommentPolicy | None = None,
+    ):
+        self.client = client
+        self.queries = queries
+        self.interval = interval
+        self.max_results = max_results
+        self.visit = visit
+        self.on_note = on_note
+        self.sink = sink
+        self.seen = seen or SeenSet()
+        self.scroll_policy = scroll_policy
+        self.comments = comments
+        self.polls = 0
+        self.emitted = 0
+
+    def _is_new(self, note: Note) -> bool:
+        return _seen_key(note) not in self.seen
+
+    async def _emit(self, note: Note) -> None:
+        if self.on_note:
+            result = self.on_note(note)
+            if inspect.isawaitable(result):
+                await result
+        if self.sink:
+            self.sink.write(note)
+        self.seen.add(_seen_key(note))
+        self.emitted += 1
+
+    # one poll, returns the new notes it emitted
+    async def poll_once(self) -> List[Note]:
+        start = time()
+        found = await self.client.search_many(
+            self.queries,
+            max_results=self.max_results,
+            filters=[self._is_new],
+            scroll_policy=self.scroll_policy,
+        )
+        new_notes = list(
+            {_seen_key(n): n for ns in found.values() for n in ns}.values()
+        )
+
+        emitted = []
+        if self.visit:
+            async for note in self.client.iter_visit_links(
+                new_notes, comments=self.comments
+            ):
+                await self._emit(note)
+                emitted.append(note)
+        else:
+            for note in new_notes:
+                await self._emit(note)
+                emitted.append(note)
+
+        if self.sink:
+            self.sink.flush()
+        self.seen.save()
+        self.polls += 1
+        self.client.metrics.observe("monitor_poll", time() - start)
+        logger.info(
+            f"Poll {self.polls}: {len(emitted)}/{len(new_notes)} new notes emitted "
+            f"in {time() - start:.1f}s, {len(self.seen)} seen"
+        )
+        return emitted
+
+    # polls until cancelled, or `max_polls` polls ran
+    async def run(self, max_polls: int | None = None) -> None:
+        while max_polls is None or self.polls < max_polls:
+            start = time()
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logger.error(f"Poll failed: {e}")
+                self.polls += 1
+            if max_polls is not None and self.polls >= max_polls:
+                break
+            await asyncio.sleep(max(0.0, self.interval - (time() - start)))
@@ -0,0 +1,98 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Set
+
+from playwright.async_api import Page
+
+from .utils import logger
+
+
+class PagePool:
+    """A bounded pool of warm pages.
+
+    Pages are created lazily by `factory` (which is expected to set up routing
+    once), reset by `reset` when they are returned, and dropped if they crashed,
+    were closed or failed to reset. A dropped page is replaced on next acquire.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Awaitable[Page]],
+        reset: Callable[[Page], Awaitable[None]],
+        size: int,
+    ):
+        self.size = size
+        self._factory = factory
+        self._reset = reset
+        self._slots = asyncio.Semaphore(size)
+        self._idle: asyncio.Queue[Page] = asyncio.Queue()
+        self._pages: Set[Page] = set()
+        self._crashed: Set[Page] = set()
+
+    @property
+    def open_pages(self) -> int:
+        return len(self._pages)
+
+    def _is_usable(self, page: Page) -> bool:
+        return not page.is_closed() and page not in self._crashed
+
+    def _on_crash(self, page: Page) -> None:
+        logger.warning(f"Page crashed: {page.url}")
+        self._crashed.add(page)
+
+    async def _discard(self, page: Page) -> None:
+        self._pages.discard(page)
+        self._crashed.discard(page)
+        try:
+            await page.close()
+        except Exception:
+            pass
+
+    async def acquire(self) -> Page:
+        await self._slots.acquire()
+        try:
+            while not self._idle.empty():
+                page = self._idle.get_nowait()
+                if self._is_usable(page):
+                    return page
+                await self._discard(page)
+
+            page = await self._factory()
+            page.on("crash", self._on_crash)
+            self._pages.add(page)
+            return page
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, page: Page, discard: bool = False) -> None:
+        try:
+            if not discard and self._is_usable(page):
+                try:
+                    await self._reset(page)
+                except Exception as e:
+                    logger.debug(f"Dropping page that failed to reset: {e}")
+                    discard = True
+            else:
+                discard = True
+
+            if discard:
+                await self._discard(page)
+            else:
+                self._idle.put_nowait(page)
+        finally:
+            self._slots.release()
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        page = await self.acquire()
+        try:
+            yield page
+        finally:
+            await self.release(page)
+
+    async def close(self) -> None:
+        while not self._idle.empty():
+            await self._discard(self._idle.get_nowait())
+        for page in list(self._pages):
+            await self._discard(page)
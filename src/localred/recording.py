@@ -0,0 +1,56 @@
+import json
+import os
+import re
+import zipfile
+from typing import List
+
+from playwright.async_api import BrowserContext
+
+from .utils import logger
+
+_NOTE_URL_RE = re.compile(r"/explore/[a-zA-Z0-9]+")
+
+
+async def record_har(context: BrowserContext, path: str) -> None:
+    """Record every response the context fetches into a HAR archive.
+
+    A `.zip` path stores response bodies as separate compressed entries. The
+    archive is written when the context closes.
+    """
+    path = os.path.expanduser(path)
+    logger.info(f"Recording responses to {path}")
+    await context.route_from_har(
+        path,
+        update=True,
+        update_content="attach" if path.endswith(".zip") else "embed",
+        update_mode="minimal",
+    )
+
+
+async def replay_har(context: BrowserContext, path: str) -> None:
+    """Serve responses from a recorded HAR archive, aborting anything not in it."""
+    path = os.path.expanduser(path)
+    logger.info(f"Replaying responses from {path}")
+    await context.route_from_har(path, not_found="abort")
+
+
+def _load_har(path: str) -> dict:
+    path = os.path.expanduser(path)
+    if not path.endswith(".zip"):
+        with open(path, "r") as f:
+            return json.load(f)
+    with zipfile.ZipFile(path) as archive:
+        name = next(n for n in archive.namelist() if n.endswith(".har"))
+        return json.loads(archive.read(name))
+
+
+# note page urls in a recorded archive, e.g. to re-extract them in replay mode
+def har_note_urls(path: str) -> List[str]:
+    urls = []
+    seen = set()
+    for entry in _load_har(path)["log"]["entries"]:
+        url = entry["request"]["url"]
+        if _NOTE_URL_RE.search(url) and url not in seen:
+            seen.add(url)
+            urls.append(url)
+    return urls
@@ -0,0 +1,69 @@
+import os
+from typing import List
+
+from playwright.async_api import Browser
+from pydantic import BaseModel
+
+from .utils import logger
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+class ProcessMemory(BaseModel):
+    pid: int
+    type: str  # browser, renderer, gpu-process, utility...
+    rss_mb: float
+
+
+class BrowserMemory(BaseModel):
+    processes: List[ProcessMemory]
+
+    @property
+    def total_mb(self) -> float:
+        return sum(p.rss_mb for p in self.processes)
+
+    @property
+    def max_renderer_mb(self) -> float:
+        return max(
+            (p.rss_mb for p in self.processes if p.type == "renderer"), default=0.0
+        )
+
+
+def _rss_mb(pid: int) -> float | None:
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss / (1024 * 1024)
+        except psutil.Error:
+            return None
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+# RSS of every process of a chromium browser running on this machine, None
+# when it cannot be measured (no psutil and no /proc, or not chromium)
+async def browser_memory(browser: Browser) -> BrowserMemory | None:
+    try:
+        session = await browser.new_browser_cdp_session()
+        try:
+            info = await session.send("SystemInfo.getProcessInfo")
+        finally:
+            await session.detach()
+    except Exception as e:
+        logger.debug(f"Cannot list browser processes: {e}")
+        return None
+
+    processes = []
+    for process in info.get("processInfo") or []:
+        rss = _rss_mb(process["id"])
+        if rss is not None:
+            processes.append(
+                ProcessMemory(pid=process["id"], type=process["type"], rss_mb=rss)
+            )
+    return BrowserMemory(processes=processes) if processes else None
@@ -0,0 +1,238 @@
+import asyncio
+import json
+import os
+import signal
+from contextlib import aclosing
+from time import time
+from typing import AsyncIterator, Tuple
+
+from pydantic import BaseModel, ValidationError
+
+from .client import BrowserClient, SearchSource
+from .models import CommentPolicy, Note, ScrollPolicy
+from .utils import logger
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Server Error"}
+
+
+class SearchRequest(BaseModel):
+    query: str | None = None  # None searches /explore
+    max_results: int = 15
+    visit_links: bool = False
+    scroll_policy: ScrollPolicy | None = None
+    with_comments: bool = True
+    source: SearchSource = "live"
+    max_age: float | None = None
+
+
+class VisitRequest(BaseModel):
+    urls: list[str]
+    comments: CommentPolicy | None = None
+    with_comments: bool = True
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, str, bytes]:
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    if not request_line:
+        raise HTTPError(400, "Empty request")
+    try:
+        method, path, _ = request_line.split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, f"Malformed request line: {request_line}")
+
+    length = 0
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value.strip())
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), path.split("?", 1)[0], body
+
+
+class LocalredServer:
+    """A small HTTP/1.1 JSON API around one warm BrowserClient.
+
+    GET  /health        liveness, uptime, the concurrency limiter state and traffic
+    GET  /metrics       client metrics in the Prometheus text format
+    POST /search        SearchRequest, streams notes as NDJSON
+    POST /visit_links   VisitRequest, streams visited notes as NDJSON
+
+    Every response closes the connection, streamed bodies end with it.
+    Listens on a unix socket when `socket_path` is set, on host:port otherwise.
+    """
+
+    def __init__(
+        self,
+        client: BrowserClient,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        socket_path: str | None = None,
+    ):
+        self.client = client
+        self.host = host
+        self.port = port
+        self.socket_path = os.path.expanduser(socket_path) if socket_path else None
+        self.started_at = time()
+        self._server: asyncio.AbstractServer | None = None
+
+    @property
+    def address(self) -> str:
+        return self.socket_path or f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        if self.socket_path:
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            self._server = await asyncio.start_unix_server(
+                self._handle, path=self.socket_path
+            )
+        else:
+            self._server = await asyncio.start_server(
+                self._handle, self.host, self.port
+            )
+            self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Serving on {self.address}")
+
+    async def stop(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    async def _handle(self, reader, writer) -> None:
+        start = time()
+        path = None
+        try:
+            method, path, body = await _read_request(reader)
+            await self._route(method, path, body, writer)
+        except HTTPError as e:
+            await self._send_json(writer, {"error": str(e)}, status=e.status)
+        except ConnectionError:
+            logger.debug(f"Client went away during {path}")
+        except Exception as e:
+            logger.error(f"Error serving {path}: {e}")
+            try:
+                await self._send_json(writer, {"error": str(e)}, status=500)
+            except ConnectionError:
+                pass
+        finally:
+            self.client.metrics.observe("serve", time() - start)
+            writer.close()
+
+    async def _route(self, method: str, path: str, body: bytes, writer) -> None:
+        if method == "GET" and path == "/health":
+            await self._send_json(
+                writer,
+                {
+                    "ok": True,
+                    "uptime": time() - self.started_at,
+                    "limiter": self.client.limiter.snapshot(),
+                    "blocked": self.client.blocker.blocked,
+                    "traffic": {
+                        operation: stats.model_dump()
+                        for operation, stats in self.client.traffic.items()
+                    },
+                    "context": self.client.context_stats(),
+                },
+            )
+        elif method == "GET" and path == "/metrics":
+            await self._send(
+                writer,
+                self.client.metrics.to_prometheus().encode(),
+                "text/plain; version=0.0.4",
+            )
+        elif method == "POST" and path == "/search":
+            req = self._parse(SearchRequest, body)
+            await self._stream(
+                writer,
+                self.client.iter_search(
+                    req.query,
+                    max_results=req.max_results,
+                    visit_links=req.visit_links,
+                    scroll_policy=req.scroll_policy,
+                    with_comments=req.with_comments,
+                    source=req.source,
+                    max_age=req.max_age,
+                ),
+            )
+        elif method == "POST" and path == "/visit_links":
+            req = self._parse(VisitRequest, body)
+            await self._stream(
+                writer,
+                self.client.iter_visit_links(
+                    req.urls, comments=req.comments, with_comments=req.with_comments
+                ),
+            )
+        else:
+            raise HTTPError(404, f"No route for {method} {path}")
+
+    def _parse(self, model: type[BaseModel], body: bytes):
+        try:
+            return model.model_validate_json(body or b"{}")
+        except ValidationError as e:
+            raise HTTPError(400, str(e))
+
+    def _head(self, status: int, content_type: str) -> bytes:
+        return (
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            "Connection: close\r\n\r\n"
+        ).encode()
+
+    async def _send(self, writer, body: bytes, content_type: str, status=200):
+        writer.write(self._head(status, content_type) + body)
+        await writer.drain()
+
+    async def _send_json(self, writer, payload: dict, status: int = 200) -> None:
+        await self._send(
+            writer, json.dumps(payload).encode() + b"\n", "application/json", status
+        )
+
+    # one note per line as soon as it is ready. Closing the generator when
+    # the caller disconnects cancels the visits still running.
+    async def _stream(self, writer, notes: AsyncIterator[Note]) -> None:
+        writer.write(self._head(200, "application/x-ndjson"))
+        async with aclosing(notes):
+            try:
+                async for note in notes:
+                    writer.write(note.model_dump_json().encode() + b"\n")
+                    await writer.drain()
+            except ConnectionError:
+                raise
+            except Exception as e:
+                # the status line is out already, report the error in the stream
+                logger.error(f"Error while streaming: {e}")
+                writer.write(json.dumps({"error": str(e)}).encode() + b"\n")
+                await writer.drain()
+
+
+# runs a daemon until SIGINT or SIGTERM, client_kwargs go to BrowserClient
+async def serve(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    socket_path: str | None = None,
+    **client_kwargs,
+) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    async with BrowserClient(**client_kwargs) as client:
+        server = LocalredServer(client, host, port, socket_path)
+        await server.start()
+        try:
+            await stop.wait()
+        finally:
+            logger.info("Shutting down")
+            await server.stop()
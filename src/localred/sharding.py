@@ -0,0 +1,145 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Literal
+
+from .client import BrowserClient, is_visited
+from .models import Note
+from .utils import logger
+
+ShardMode = Literal["context", "browser", "process"]
+
+
+def _to_note(url_or_note: str | Note) -> Note:
+    return Note(url=url_or_note) if isinstance(url_or_note, str) else url_or_note
+
+
+async def _visit_all(client: BrowserClient, notes: List[Note]) -> List[Note]:
+    # unlike visit_links, keeps failed notes so results line up with the input
+    return await asyncio.gather(*[client.visit_link(n) for n in notes])
+
+
+# kwargs of a shard launching its own browser. Only replay is shared, several
+# browsers recording into one archive would overwrite each other.
+def _shard_kwargs(client_kwargs: dict, storage_state: dict) -> dict:
+    kwargs = {
+        **client_kwargs,
+        "remote_debugging_port": 0,
+        "storage_state": storage_state,
+    }
+    kwargs.pop("record_path", None)
+    return kwargs
+
+
+async def _visit_in_new_browser(
+    notes: List[Note], client_kwargs: dict, storage_state: dict
+) -> List[Note]:
+    async with BrowserClient(**_shard_kwargs(client_kwargs, storage_state)) as client:
+        return await _visit_all(client, notes)
+
+
+# entry point of worker processes, notes are passed around as dicts
+def _visit_in_process(
+    note_dicts: List[dict], client_kwargs: dict, storage_state: dict
+) -> List[dict]:
+    notes = [Note.model_validate(d) for d in note_dicts]
+    visited = asyncio.run(_visit_in_new_browser(notes, client_kwargs, storage_state))
+    return [n.model_dump(exclude={"id"}) for n in visited]
+
+
+class ShardedClient:
+    """Spreads visit_links over several shards, each with its own page pool.
+
+    - "context": one browser, a browser context per shard
+    - "browser": a browser process per shard, all driven from this event loop
+    - "process": a worker process per shard, each driving its own browser
+
+    All shards share the login storage state of the primary client, which is
+    created from `client_kwargs` like a plain BrowserClient.
+    """
+
+    def __init__(self, shards: int = 4, mode: ShardMode = "context", **client_kwargs):
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        self.shards = shards
+        self.mode = mode
+        self.client_kwargs = client_kwargs
+        self.primary = BrowserClient(**client_kwargs)
+        self._clients: List[BrowserClient] = []
+
+    async def __aenter__(self):
+        await self.primary.__aenter__()
+        try:
+            if self.mode == "context":
+                self._clients = [self.primary] + [
+                    await self.primary.new_shard() for _ in range(self.shards - 1)
+                ]
+            elif self.mode == "browser":
+                storage_state = await self.primary.get_storage_state()
+                self._clients = [self.primary]
+                for _ in range(self.shards - 1):
+                    client = BrowserClient(
+                        **_shard_kwargs(self.client_kwargs, storage_state)
+                    )
+                    self._clients.append(await client.__aenter__())
+            elif self.mode != "process":
+                raise ValueError(f"Unknown shard mode: {self.mode}")
+        except BaseException:
+            await self.__aexit__(None, None, None)
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        for client in self._clients[1:]:
+            await client.__aexit__(exc_type, exc_val, exc_tb)
+        self._clients = []
+        await self.primary.__aexit__(exc_type, exc_val, exc_tb)
+
+    # same contract as BrowserClient.visit_links: input order, failures dropped
+    async def visit_links(self, url_or_notes: List[str | Note]) -> List[Note]:
+        notes = [_to_note(n) for n in url_or_notes]
+        # stripe notes over shards so slow and fast notes spread evenly
+        chunks = [notes[i :: self.shards] for i in range(self.shards)]
+
+        if self.mode == "process":
+            results = await self._visit_in_processes(chunks)
+        else:
+            results = await asyncio.gather(
+                *[
+                    _visit_all(client, chunk)
+                    for client, chunk in zip(self._clients, chunks)
+                ]
+            )
+
+        merged: List[Note] = [None] * len(notes)
+        for shard_index, shard_results in enumerate(results):
+            for i, note in enumerate(shard_results):
+                merged[shard_index + i * self.shards] = note
+
+        visited = [n for n in merged if is_visited(n)]
+        logger.info(
+            f"Visited {len(visited)}/{len(notes)} notes over {self.shards} {self.mode} shards"
+        )
+        return visited
+
+    async def _visit_in_processes(self, chunks: List[List[Note]]) -> List[List[Note]]:
+        storage_state = await self.primary.get_storage_state()
+        loop = asyncio.get_running_loop()
+        # spawn, forking a process that runs an event loop is not safe
+        with ProcessPoolExecutor(
+            max_workers=self.shards, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            results = await asyncio.gather(
+                *[
+                    loop.run_in_executor(
+                        executor,
+                        _visit_in_process,
+                        [n.model_dump(exclude={"id"}) for n in chunk],
+                        self.client_kwargs,
+                        storage_state,
+                    )
+                    for chunk in chunks
+                    if chunk
+                ]
+            )
+        return [[Note.model_validate(d) for d in chunk] for chunk in results]
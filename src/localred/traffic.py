@@ -0,0 +1,69 @@
+import asyncio
+from typing import Set
+
+from playwright.async_api import Page, Request
+
+from .models import ResourceTraffic, TrafficStats
+from .utils import logger
+
+# failure text of requests dropped by a route or Network.setBlockedURLs
+_BLOCKED_ERROR = "ERR_BLOCKED_BY_CLIENT"
+
+
+class TrafficMeter:
+    """Counts the requests of one page and their encoded bytes, by resource type.
+
+    Finished requests are sized with Request.sizes(), failed ones are split
+    into blocked (by the ResourceBlocker) and failed. Attach it before the
+    page navigates and stop it before the page is reused.
+    """
+
+    def __init__(self, page: Page):
+        self.page = page
+        self.stats = TrafficStats()
+        self._pending: Set[asyncio.Task] = set()
+
+    def attach(self) -> None:
+        self.page.on("requestfinished", self._on_finished)
+        self.page.on("requestfailed", self._on_failed)
+
+    def _on_finished(self, request: Request) -> None:
+        # sizes() is a round trip to the browser, keep the event handler sync
+        task = asyncio.ensure_future(self._add_finished(request))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _add_finished(self, request: Request) -> None:
+        traffic = self.stats.allowed.setdefault(
+            request.resource_type, ResourceTraffic()
+        )
+        traffic.requests += 1
+        try:
+            sizes = await request.sizes()
+        except Exception as e:
+            # e.g. the page closed, the request still counts
+            logger.debug(f"No sizes for {request.url}: {e}")
+            return
+        traffic.bytes_received += sizes["responseHeadersSize"] + max(
+            sizes["responseBodySize"], 0
+        )
+        traffic.bytes_sent += sizes["requestHeadersSize"] + max(
+            sizes["requestBodySize"], 0
+        )
+
+    def _on_failed(self, request: Request) -> None:
+        counts = (
+            self.stats.blocked
+            if _BLOCKED_ERROR in (request.failure or "")
+            else self.stats.failed
+        )
+        counts[request.resource_type] = counts.get(request.resource_type, 0) + 1
+
+    # detaches from the page and waits for the pending sizes, at most `timeout`
+    # seconds. Returns the stats.
+    async def stop(self, timeout: float = 2.0) -> TrafficStats:
+        self.page.remove_listener("requestfinished", self._on_finished)
+        self.page.remove_listener("requestfailed", self._on_failed)
+        if self._pending:
+            await asyncio.wait(list(self._pending), timeout=timeout)
+        return self.stats
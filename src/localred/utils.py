@@ -1,5 +1,6 @@
 import logging
 import os
+from functools import cache
 from typing import Optional
 from urllib.parse import quote
 
@@ -20,15 +21,37 @@ except AttributeError:
 logger.propagate = False  # Prevent duplicate logging
 
 
-def build_search_url(query: Optional[str]) -> str:
+DEFAULT_BASE_URL = "https://www.xiaohongshu.com"
+
+
+def build_search_url(query: Optional[str], base_url: str = DEFAULT_BASE_URL) -> str:
     if not query:
-        return "https://www.xiaohongshu.com/explore?channel_type=web_note_detail_r10"
-    return f"https://www.xiaohongshu.com/search_result?keyword={quote(query)}&source=web_explore_feed"
+        return f"{base_url}/explore?channel_type=web_note_detail_r10"
+    return f"{base_url}/search_result?keyword={quote(query)}&source=web_explore_feed"
 
 
-def load_js_file(filename: str) -> None:
+@cache
+def load_js_file(filename: str) -> str:
     if not filename.endswith(".js"):
         filename += ".js"
     fp = os.path.join(os.path.dirname(__file__), "js", filename)
     with open(fp, "r") as f:
         return f.read()
+
+
+# parse counts like "123", "1.2千", "1万+" into an int, None if not parsable
+def parse_count(count: str | int | None) -> Optional[int]:
+    if isinstance(count, int):
+        return count
+    if not count or not count.strip():
+        return None
+    count = count.strip().rstrip("+")
+    multiplier = 1
+    if count.endswith("千"):
+        multiplier, count = 1000, count[:-1]
+    elif count.endswith("万"):
+        multiplier, count = 10000, count[:-1]
+    try:
+        return int(float(count) * multiplier)
+    except ValueError:
+        return None